@@ -1,9 +1,26 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from supabase import create_client
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from monitor.charts import compress_steps, scatter
+from monitor.comparison_query import filter_param
+from monitor.derived_cache import DerivedFrameCache
+from monitor.export import EXPORT_FORMATS, export_file, frame_chunks, history_chunks, remove_export
+from monitor.history_index import build_history_index, product_history, series_positions
+from monitor.datasets import ALL_FILTERS, BackgroundRefresher, DataRegistry
+from monitor.history_store import history_version
+from monitor.normalize import strip_deposit_type
+from monitor.perf import RerunTimer, emit
+from monitor.rate_changes import detect_rate_changes, format_change_table, recent_changes
+from monitor.rate_cube import WOORI_BANK, build_rate_cube, cube_products, matching_woori, select_series
+from monitor.snapshots import summary_deltas, summary_stats
+from monitor.spreads import build_spreads, format_streak_table, spread_streaks
+from monitor.transforms import VULN_COUNT_COL, comparison_columns, derive_frames, headline_stats
 
 st.set_page_config(page_title="우리은행 금리 경쟁력 모니터", page_icon="🏦", layout="wide")
 
@@ -40,7 +57,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-PERIOD_ORDER = [1, 3, 6, 12, 24, 36]
+# rerun 단위 성능 계측 (?admin=1 이면 사이드바에 패널 표시)
+perf = RerunTimer()
 
 # ─────────────────────────────────────────
 # Supabase 연결
@@ -54,82 +72,159 @@ supabase = get_supabase()
 # ─────────────────────────────────────────
 # 데이터 로드
 # ─────────────────────────────────────────
-@st.cache_data(ttl=300)
-def load_comparison_data():
-    response = supabase.rpc("get_new_better_products_v3", {}).execute()
-    return pd.DataFrame(response.data)
-
-@st.cache_data(ttl=300)
-def load_history_data():
-    response = supabase.table("finance_data").select(
-        "collected_at, kor_co_nm, fin_prdt_nm, save_trm, intr_rate, intr_rate2, spcl_cnd, product_type, rsrv_type_nm"
-    ).execute()
-    df = pd.DataFrame(response.data)
-    df["collected_at"] = pd.to_datetime(df["collected_at"])
-    return df
+@st.cache_resource
+def get_datasets():
+    # 데이터셋별 버전/watermark — 새로고침 시 바뀐 부분만 다시 받음
+    # 프로세스 첫 실행 때 두 데이터셋을 미리 받고, TTL 만료 전에 백그라운드에서 갱신
+    # SHARED_HISTORY_CACHE=1 이면 같은 호스트의 replica 들이 추이 데이터 사본을 공유 (한 프로세스만 Supabase 동기화)
+    registry = DataRegistry(supabase, ttl=300, shared=os.environ.get("SHARED_HISTORY_CACHE") == "1")
+    BackgroundRefresher(registry).start()
+    return registry
+
+datasets = get_datasets()
+
+@st.cache_resource(max_entries=2)
+def get_history_index(version, _hist_df):
+    # 데이터 버전이 같으면 정규화 컬럼/상품별 slice 를 재사용
+    return build_history_index(_hist_df)
+
+@st.cache_resource(max_entries=2)
+def get_rate_change_events(version, _hist_df):
+    # 전체 추이의 금리 변동 이벤트 (데이터 버전마다 한 번 계산)
+    return detect_rate_changes(_hist_df)
+
+@st.cache_resource(max_entries=2)
+def get_rate_cube(version, _hist_df):
+    # 수집 시각 × (은행, 상품, 기간, 적립방식) 최대금리 큐브 (데이터 버전마다 한 번 펼침)
+    return build_rate_cube(_hist_df)
+
+@st.cache_resource(max_entries=2)
+def get_spreads(version, _hist_df):
+    # 우리은행 대비 일별 금리차와 시리즈별 연속 우위 통계 (데이터 버전마다 한 번 계산)
+    # 단일 상품 선택용 (은행, 상품명, 기간) → 행 위치도 함께 만든다
+    spreads = build_spreads(_hist_df)
+    streaks = spread_streaks(spreads)
+    return spreads, streaks, series_positions(spreads), series_positions(streaks)
+
+@st.cache_resource
+def get_derived_cache():
+    # 모든 세션이 공유하는 파생 프레임 LRU (데이터 버전 + 필터 선택 키)
+    return DerivedFrameCache(max_bytes=int(os.environ.get("DERIVED_CACHE_MB", "256")) * 1024 * 1024)
+
+# 추이 데이터는 비교 데이터와 동시에 로드 풀에서 받는다 (로컬 Parquet 사본 + watermark 이후 행만 증분 동기화)
+history_future = datasets.submit(datasets.history.get)
 
 try:
-    df = load_comparison_data()
+    with perf.span("load.facets"):
+        facets = datasets.facets()
 except Exception as e:
     st.error(f"데이터 로딩 실패: {e}")
     st.stop()
 
-try:
-    hist_df = load_history_data()
-except Exception as e:
-    st.warning(f"추이 데이터 로딩 실패: {e}")
-    hist_df = pd.DataFrame()
-
-COL = {
-    "type":       df.columns[0],
-    "woori_prod": df.columns[1],
-    "period":     df.columns[2],
-    "bank":       df.columns[3],
-    "bank_prod":  df.columns[4],
-    "woori_base": df.columns[5],
-    "woori_max":  df.columns[6],
-    "bank_base":  df.columns[7],
-    "bank_max":   df.columns[8],
-    "rate_diff":  df.columns[9],
-    "benefit":    df.columns[10],
-}
-
 # ─────────────────────────────────────────
 # 사이드바 필터
 # ─────────────────────────────────────────
 with st.sidebar:
     st.markdown("## 🔍 필터")
     st.markdown("---")
-    sel_type   = st.multiselect("상품 타입",       sorted(df[COL["type"]].dropna().unique()),   default=sorted(df[COL["type"]].dropna().unique()))
-    sel_period = st.multiselect("저축 기간 (개월)", sorted(df[COL["period"]].dropna().unique()), default=sorted(df[COL["period"]].dropna().unique()))
-    sel_bank   = st.multiselect("타행명",           sorted(df[COL["bank"]].dropna().unique()),   default=sorted(df[COL["bank"]].dropna().unique()))
+    sel_type   = st.multiselect("상품 타입",       facets["types"],   default=facets["types"])
+    sel_period = st.multiselect("저축 기간 (개월)", facets["periods"], default=facets["periods"])
+    sel_bank   = st.multiselect("타행명",           facets["banks"],   default=facets["banks"])
     st.markdown("---")
     if st.button("🔄 새로고침"):
-        st.cache_data.clear()
+        # 비교 데이터는 epoch 만 올리고, 추이 데이터는 마지막 수집 시각 이후 행만 받음
+        datasets.refresh_comparison()
+        try:
+            datasets.history.refresh()
+        except Exception as e:
+            st.warning(f"추이 데이터 갱신 실패: {e}")
         st.rerun()
 
-mask = (
-    df[COL["type"]].isin(sel_type) &
-    df[COL["period"]].isin(sel_period) &
-    df[COL["bank"]].isin(sel_bank)
+filter_args = (
+    filter_param(sel_type,   facets["types"]),
+    filter_param(sel_period, facets["periods"]),
+    filter_param(sel_bank,   facets["banks"]),
 )
-fdf = df[mask].copy()
-fdf_sorted = fdf.sort_values(COL["rate_diff"], ascending=False).reset_index(drop=True)
+
+try:
+    # 사이드바 선택값을 RPC 파라미터로 넘겨 서버에서 필터링 (None = 전체)
+    with perf.span("load.comparison"):
+        fdf, cmp_version = datasets.comparison_rows(filter_args)
+except Exception as e:
+    st.error(f"데이터 로딩 실패: {e}")
+    st.stop()
+
+if fdf.empty:
+    st.info("선택한 조건에 해당하는 경쟁 상품이 없습니다.")
+    st.stop()
+
+try:
+    with perf.span("load.history"):
+        hist_df = history_future.result()
+except Exception as e:
+    st.warning(f"추이 데이터 로딩 실패: {e}")
+    hist_df = pd.DataFrame()
+
+hist_version = history_version(hist_df)
+with perf.span("history.index"):
+    hist_index = get_history_index(hist_version, hist_df)
+
+COL = comparison_columns(fdf)
+
+# 전체 선택이면 마지막 수집일 스냅샷 요약을 그대로 사용 (전일 대비 변화 포함), 아니면 fdf 로 직접 집계
+# 스냅샷이 아직 마지막 수집분으로 갱신되지 않았으면 (materialize 전) None → fdf 로 집계
+summaries = None
+if filter_args == ALL_FILTERS:
+    try:
+        with perf.span("load.competitiveness"):
+            summaries = datasets.competitiveness()
+    except Exception:
+        summaries = None
+snapshot_date = summaries[0]["snapshot_date"] if summaries else None
+
+# ─────────────────────────────────────────
+# 파생 프레임 (데이터 버전 + 필터 선택 + 스냅샷 날짜가 같으면 캐시 재사용)
+# ─────────────────────────────────────────
+def build_derived_frames():
+    # 서버 집계 결과 (RPC 미배포 시 None → fdf 로 직접 집계)
+    pivot, vuln = datasets.heatmaps(
+        filter_args,
+        (COL["bank"], COL["period"], COL["rate_diff"]),
+        (COL["woori_prod"], COL["period"], VULN_COUNT_COL),
+        snapshot_date,
+    )
+    return derive_frames(fdf, pivot, vuln)
+
+with perf.span("derive.frames"):
+    derived = get_derived_cache().get_or_compute((cmp_version, filter_args, snapshot_date), build_derived_frames)
 
 today     = datetime.now().strftime("%Y년 %m월 %d일")
-max_diff  = fdf[COL["rate_diff"]].max() if len(fdf) > 0 else 0
-max_row   = fdf.loc[fdf[COL["rate_diff"]].idxmax()] if len(fdf) > 0 else None
-high_risk = len(fdf[fdf[COL["rate_diff"]] >= 0.3])
+
+if summaries:
+    stats  = summary_stats(summaries[0])
+    deltas = summary_deltas(summaries[0], summaries[1] if len(summaries) > 1 else None)
+    today  = pd.Timestamp(snapshot_date).strftime("%Y년 %m월 %d일") + " 수집"
+else:
+    stats  = headline_stats(fdf)
+    deltas = None
+max_diff  = stats["max_diff"]
+high_risk = stats["high_risk"]
+
+def delta_label(key, fmt="+d", unit="개"):
+    # 전일 대비 변화 (스냅샷이 없거나 변화가 없으면 빈 문자열)
+    if not deltas or not deltas[key]:
+        return ""
+    return f" · 전일 대비 {format(deltas[key], fmt)}{unit}"
 
 # ─────────────────────────────────────────
 # 상단 배너
 # ─────────────────────────────────────────
-if max_row is not None:
+if stats["top_bank"] is not None:
     st.markdown(f"""
     <div class="summary-banner">
         <div class="date">📅 {today} 기준</div>
-        <div class="headline">🚨 우리은행 대비 최대 {max_diff:.2f}%p 높은 타행 상품 {len(fdf)}개 발견</div>
-        <div class="sub">고위험 상품(금리차 0.3%p↑) {high_risk}개 · 가장 위협적: {max_row[COL['bank']]} '{max_row[COL['bank_prod']]}'</div>
+        <div class="headline">🚨 우리은행 대비 최대 {max_diff:.2f}%p 높은 타행 상품 {stats['rows']}개 발견</div>
+        <div class="sub">고위험 상품(금리차 0.3%p↑) {high_risk}개 · 가장 위협적: {stats['top_bank']} '{stats['top_prod']}'</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -146,58 +241,24 @@ tabs = st.tabs([
 # ══════════════════════════════════════════
 # TAB 1: 종합 현황
 # ══════════════════════════════════════════
-with tabs[0]:
+with tabs[0], perf.span("render.tab_overview"):
     st.markdown("### 🏠 종합 현황")
     st.markdown('<div class="desc-box">우리은행보다 금리가 높은 타행 상품을 금리차 순으로 확인합니다. 각 상품을 클릭하면 기간별 금리 변동 추이를 확인할 수 있습니다.</div>', unsafe_allow_html=True)
 
     # ── 핵심 지표 ──
     c1, c2, c3, c4 = st.columns(4)
     for col, (label, value, sub) in zip([c1,c2,c3,c4], [
-        ("총 경쟁 상품",  f"{len(fdf)}개",         "우리은행보다 금리 높은 상품"),
-        ("최대 금리차",   f"{max_diff:.2f}%p",      max_row[COL['bank']] if max_row is not None else "-"),
-        ("고위험 상품",   f"{high_risk}개",         "금리차 0.3%p 이상"),
-        ("비교 타행 수",  f"{fdf[COL['bank']].nunique()}개", "은행"),
+        ("총 경쟁 상품",  f"{stats['rows']}개",    "우리은행보다 금리 높은 상품" + delta_label("rows")),
+        ("최대 금리차",   f"{max_diff:.2f}%p",      (stats["top_bank"] or "-") + delta_label("max_diff", "+.2f", "%p")),
+        ("고위험 상품",   f"{high_risk}개",         "금리차 0.3%p 이상" + delta_label("high_risk")),
+        ("비교 타행 수",  f"{stats['banks']}개",   "은행" + delta_label("banks")),
     ]):
         with col:
             st.markdown(f'<div class="metric-card"><div class="metric-label">{label}</div><div class="metric-value">{value}</div><div class="metric-sub">{sub}</div></div>', unsafe_allow_html=True)
 
     st.markdown("")
 
-    import re
-
-    def strip_deposit_type(name):
-        """상품명에서 (자유적립식) / (정액적립식) 등 괄호 패턴 제거"""
-        return re.sub(r"\s*\(자유적립식\)|\s*\(정액적립식\)", "", name).strip()
-
-    def get_deposit_type(row):
-        """적립 방식 추출 — 2가지 케이스 모두 처리
-        케이스 A: fin_prdt_nm에 괄호로 포함된 경우
-        케이스 B: rsrv_type_nm 별도 컬럼에 있는 경우
-        """
-        # 1순위: rsrv_type_nm 컬럼 (케이스 B)
-        rsrv = row.get("rsrv_type_nm", None)
-        if pd.notna(rsrv) and rsrv:
-            if "자유" in str(rsrv):
-                return "자유"
-            elif "정액" in str(rsrv):
-                return "정액"
-        # 2순위: 상품명 괄호 파싱 (케이스 A)
-        nm = str(row.get("fin_prdt_nm", ""))
-        if "자유적립식" in nm:
-            return "자유"
-        elif "정액적립식" in nm:
-            return "정액"
-        return "일반"
-
-    # ── 상품명 기준 중복 제거: 괄호 제거 후 금리차 가장 높은 기간 대표값으로 ──
-    fdf_dedup = fdf.copy()
-    fdf_dedup["_clean_prod"] = fdf_dedup[COL["bank_prod"]].apply(strip_deposit_type)
-
-    dedup_df = (
-        fdf_dedup.sort_values(COL["rate_diff"], ascending=False)
-        .drop_duplicates(subset=[COL["bank"], "_clean_prod"], keep="first")
-        .reset_index(drop=True)
-    )
+    dedup_df = derived["dedup_df"]
 
     # ── 세션 상태: 전체 보기 토글 ──
     if "show_all_products" not in st.session_state:
@@ -207,6 +268,8 @@ with tabs[0]:
     display_list = dedup_df if st.session_state["show_all_products"] else dedup_df.head(TOP_N)
 
     st.markdown('<div class="section-title">📋 금리차 높은 순 상품 랭킹</div>', unsafe_allow_html=True)
+    lazy_charts = st.toggle("⚡ 추이 그래프 지연 로딩", value=True, key="lazy_charts",
+                            help="켜면 각 상품의 그래프·요약을 '금리 추이 보기'를 누른 상품만 생성합니다.")
 
     # ── 색상 팔레트 ──
     # 자유적립식 or 일반: 파랑 계열 실선
@@ -228,34 +291,22 @@ with tabs[0]:
         36: "#14532d",
     }
 
-    for i, (_, row) in enumerate(display_list.iterrows()):
-        bank_nm    = row[COL["bank"]]
-        prod_nm_raw = row[COL["bank_prod"]]
-        prod_nm    = strip_deposit_type(prod_nm_raw)   # 헤더엔 괄호 제거한 이름
-        bank_max   = row[COL["bank_max"]]
-        rate_diff  = row[COL["rate_diff"]]
-        rank       = i + 1
-
-        label = f"**{rank}위** · {bank_nm}  |  {prod_nm}  |  최고금리 **{bank_max:.2f}%**  |  금리차 **+{rate_diff:.2f}%p**"
+    def render_product_detail(bank_nm, prod_nm, timer=perf):
+        """상품 하나의 기간 × 적립방식 추이 그래프와 요약 (timer: 구간을 기록할 RerunTimer)"""
+        if hist_df.empty:
+            st.info("추이 데이터를 불러올 수 없습니다.")
+        else:
+            # 괄호 포함된 원래 이름들 전부 매칭 (자유/정액 둘 다 포함) — 인덱스에서 O(1) 조회
+            prod_hist = product_history(hist_index, bank_nm, prod_nm)
 
-        with st.expander(label, expanded=False):
-            if hist_df.empty:
-                st.info("추이 데이터를 불러올 수 없습니다.")
+            if prod_hist is None or prod_hist.empty:
+                st.info("해당 상품의 금리 추이 데이터가 없습니다.")
             else:
-                # 괄호 포함된 원래 이름들 전부 매칭 (자유/정액 둘 다 포함)
-                prod_hist = hist_df[
-                    (hist_df["kor_co_nm"] == bank_nm) &
-                    (hist_df["fin_prdt_nm"].apply(strip_deposit_type) == prod_nm)
-                ].copy()
-                prod_hist["_deposit_type"] = prod_hist.apply(get_deposit_type, axis=1)
-
-                if prod_hist.empty:
-                    st.info("해당 상품의 금리 추이 데이터가 없습니다.")
-                else:
-                    available_periods = sorted(prod_hist["save_trm"].dropna().unique().tolist())
-                    deposit_types     = sorted(prod_hist["_deposit_type"].unique().tolist())
-
-                    # ── 기간 × 적립방식 멀티라인 그래프 ──
+                available_periods = sorted(prod_hist["save_trm"].dropna().unique().tolist())
+                deposit_types     = sorted(prod_hist["_deposit_type"].unique().tolist())
+
+                # ── 기간 × 적립방식 멀티라인 그래프 ──
+                with timer.span("figure.product_trend"):
                     fig_exp = go.Figure()
                     for dtype in deposit_types:
                         dtype_df = prod_hist[prod_hist["_deposit_type"] == dtype]
@@ -268,9 +319,10 @@ with tabs[0]:
                             if trm_df.empty:
                                 continue
                             color = color_map.get(int(trm), "#64748b")
-                            fig_exp.add_trace(go.Scatter(
-                                x=trm_df["collected_at"],
-                                y=trm_df["intr_rate2"],
+                            # 변동 지점 앞뒤 점만 남겨 전송량 축소 (선 모양은 동일)
+                            trm_df = compress_steps(trm_df, ["intr_rate2"])
+                            fig_exp.add_trace(scatter(
+                                trm_df["collected_at"], trm_df["intr_rate2"],
                                 mode="lines+markers",
                                 name=f"{int(trm)}개월{type_label}",
                                 line=dict(color=color, width=2, dash=line_dash),
@@ -295,49 +347,76 @@ with tabs[0]:
                         height=360,
                         title=dict(text=f"{bank_nm} · {prod_nm} — 기간별 최대금리 추이", font=dict(size=13), x=0),
                     )
-                    st.plotly_chart(fig_exp, use_container_width=True)
+                st.plotly_chart(fig_exp, use_container_width=True)
+
+                # ── 결과 요약 (st 기본 문법) ──
+                st.divider()
+
+                # 적립방식 × 기간 조합으로 컬럼 구성
+                summary_items = []
+                for dtype in deposit_types:
+                    for trm in available_periods:
+                        trm_df = prod_hist[
+                            (prod_hist["_deposit_type"] == dtype) &
+                            (prod_hist["save_trm"] == trm)
+                        ].sort_values("collected_at")
+                        if not trm_df.empty:
+                            summary_items.append((dtype, trm, trm_df))
+
+                sum_cols = st.columns(len(summary_items)) if summary_items else st.columns(1)
+                for ci, (dtype, trm, trm_df) in enumerate(summary_items):
+                    first_r  = trm_df["intr_rate2"].iloc[0]
+                    latest_r = trm_df["intr_rate2"].iloc[-1]
+                    delta    = latest_r - first_r
+                    type_label = f" ({dtype})" if len(deposit_types) > 1 else ""
+                    with sum_cols[ci]:
+                        # delta가 0이면 None으로 넘기고 회색 텍스트로 별도 표시
+                        if delta == 0:
+                            st.metric(
+                                label=f"{int(trm)}개월{type_label}",
+                                value=f"{latest_r:.2f}%",
+                                delta=None,
+                            )
+                            st.caption("변동 없음")
+                        else:
+                            st.metric(
+                                label=f"{int(trm)}개월{type_label}",
+                                value=f"{latest_r:.2f}%",
+                                delta=f"{delta:+.2f}%p",
+                            )
+
+                # 데이터 수집 기간
+                date_min = prod_hist["collected_at"].min().strftime("%Y-%m-%d")
+                date_max = prod_hist["collected_at"].max().strftime("%Y-%m-%d")
+                deposit_label = " · ".join([f"{d}적립식" if d != "일반" else "일반" for d in deposit_types])
+                st.caption(f"📅 수집 기간: {date_min} ~ {date_max}  |  적립 방식: {deposit_label}")
+
+    # ── 지연 렌더링: 토글을 켠 상품만 그래프/요약을 만들어 전송 (상품별 fragment 로 부분 재실행) ──
+    _fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+    @_fragment
+    def render_product_detail_lazy(bank_nm, prod_nm):
+        if st.toggle("📈 금리 추이 보기", key=f"detail_{bank_nm}_{prod_nm}"):
+            # fragment 만 다시 실행될 때는 전체 rerun 기록이 이미 끝났으므로 자기 타이머로 따로 남긴다
+            timer = RerunTimer()
+            render_product_detail(bank_nm, prod_nm, timer)
+            emit(timer.record({"bank": bank_nm, "product": prod_nm}, scope="fragment.product_detail"))
 
-                    # ── 결과 요약 (st 기본 문법) ──
-                    st.divider()
+    for i, (_, row) in enumerate(display_list.iterrows()):
+        bank_nm    = row[COL["bank"]]
+        prod_nm_raw = row[COL["bank_prod"]]
+        prod_nm    = strip_deposit_type(prod_nm_raw)   # 헤더엔 괄호 제거한 이름
+        bank_max   = row[COL["bank_max"]]
+        rate_diff  = row[COL["rate_diff"]]
+        rank       = i + 1
 
-                    # 적립방식 × 기간 조합으로 컬럼 구성
-                    summary_items = []
-                    for dtype in deposit_types:
-                        for trm in available_periods:
-                            trm_df = prod_hist[
-                                (prod_hist["_deposit_type"] == dtype) &
-                                (prod_hist["save_trm"] == trm)
-                            ].sort_values("collected_at")
-                            if not trm_df.empty:
-                                summary_items.append((dtype, trm, trm_df))
-
-                    sum_cols = st.columns(len(summary_items)) if summary_items else st.columns(1)
-                    for ci, (dtype, trm, trm_df) in enumerate(summary_items):
-                        first_r  = trm_df["intr_rate2"].iloc[0]
-                        latest_r = trm_df["intr_rate2"].iloc[-1]
-                        delta    = latest_r - first_r
-                        type_label = f" ({dtype})" if len(deposit_types) > 1 else ""
-                        with sum_cols[ci]:
-                            # delta가 0이면 None으로 넘기고 회색 텍스트로 별도 표시
-                            if delta == 0:
-                                st.metric(
-                                    label=f"{int(trm)}개월{type_label}",
-                                    value=f"{latest_r:.2f}%",
-                                    delta=None,
-                                )
-                                st.caption("변동 없음")
-                            else:
-                                st.metric(
-                                    label=f"{int(trm)}개월{type_label}",
-                                    value=f"{latest_r:.2f}%",
-                                    delta=f"{delta:+.2f}%p",
-                                )
-
-                    # 데이터 수집 기간
-                    date_min = prod_hist["collected_at"].min().strftime("%Y-%m-%d")
-                    date_max = prod_hist["collected_at"].max().strftime("%Y-%m-%d")
-                    deposit_label = " · ".join([f"{d}적립식" if d != "일반" else "일반" for d in deposit_types])
-                    st.caption(f"📅 수집 기간: {date_min} ~ {date_max}  |  적립 방식: {deposit_label}")
+        label = f"**{rank}위** · {bank_nm}  |  {prod_nm}  |  최고금리 **{bank_max:.2f}%**  |  금리차 **+{rate_diff:.2f}%p**"
+
+        with st.expander(label, expanded=False):
+            if lazy_charts:
+                render_product_detail_lazy(bank_nm, prod_nm)
+            else:
+                render_product_detail(bank_nm, prod_nm)
 
     st.markdown("")
 
@@ -356,20 +435,19 @@ with tabs[0]:
 # ══════════════════════════════════════════
 # TAB 2: 경쟁 구조
 # ══════════════════════════════════════════
-with tabs[1]:
+with tabs[1], perf.span("render.tab_structure"):
     st.markdown("### 🗺️ 경쟁 구조")
     st.markdown('<div class="desc-box">타행이 어느 저축 기간에 집중적으로 경쟁하는지 파악합니다. 히트맵으로 타행 × 기간 조합의 경쟁 강도를 확인하세요.</div>', unsafe_allow_html=True)
 
     st.markdown('<div class="section-title">타행 × 저축기간 금리차 히트맵</div>', unsafe_allow_html=True)
-    pivot = fdf.groupby([COL["bank"], COL["period"]])[COL["rate_diff"]].max().reset_index()
-    pivot_table = pivot.pivot(index=COL["bank"], columns=COL["period"], values=COL["rate_diff"]).fillna(0)
-    # 저축 기간 순서 정렬
-    pivot_table = pivot_table.reindex(columns=[p for p in PERIOD_ORDER if p in pivot_table.columns])
-
-    fig_h = px.imshow(pivot_table, color_continuous_scale="Blues",
-                      labels=dict(x="저축 기간(개월)", y="타행명", color="최대 금리차(%p)"),
-                      text_auto=".2f", aspect="auto")
-    fig_h.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=360)
+    pivot       = derived["pivot"]
+    pivot_table = derived["pivot_table"]
+
+    with perf.span("figure.rate_diff_heatmap"):
+        fig_h = px.imshow(pivot_table, color_continuous_scale="Blues",
+                          labels=dict(x="저축 기간(개월)", y="타행명", color="최대 금리차(%p)"),
+                          text_auto=".2f", aspect="auto")
+        fig_h.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=360)
     st.plotly_chart(fig_h, use_container_width=True)
 
     max_combo = pivot.loc[pivot[COL["rate_diff"]].idxmax()]
@@ -381,15 +459,14 @@ with tabs[1]:
     """, unsafe_allow_html=True)
 
     st.markdown('<div class="section-title">우리은행 상품별 경쟁 상품 수</div>', unsafe_allow_html=True)
-    vuln = fdf.groupby([COL["woori_prod"], COL["period"]]).size().reset_index(name="경쟁 상품 수")
-    vuln_pivot = vuln.pivot(index=COL["woori_prod"], columns=COL["period"], values="경쟁 상품 수").fillna(0)
-    # 저축 기간 순서 정렬
-    vuln_pivot = vuln_pivot.reindex(columns=[p for p in PERIOD_ORDER if p in vuln_pivot.columns])
-
-    fig_v = px.imshow(vuln_pivot, color_continuous_scale="Reds",
-                      labels=dict(x="저축 기간(개월)", y="우리은행 상품", color="경쟁 상품 수"),
-                      text_auto=True, aspect="auto")
-    fig_v.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=300)
+    vuln       = derived["vuln"]
+    vuln_pivot = derived["vuln_pivot"]
+
+    with perf.span("figure.vuln_heatmap"):
+        fig_v = px.imshow(vuln_pivot, color_continuous_scale="Reds",
+                          labels=dict(x="저축 기간(개월)", y="우리은행 상품", color="경쟁 상품 수"),
+                          text_auto=True, aspect="auto")
+        fig_v.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=300)
     st.plotly_chart(fig_v, use_container_width=True)
 
     worst_prod = vuln.loc[vuln["경쟁 상품 수"].idxmax()]
@@ -403,66 +480,105 @@ with tabs[1]:
 # ══════════════════════════════════════════
 # TAB 3: 금리 변동 추이
 # ══════════════════════════════════════════
-with tabs[2]:
+with tabs[2], perf.span("render.tab_trend"):
     st.markdown("### 📈 금리 변동 추이")
     st.markdown('<div class="desc-box">특정 상품의 날짜별 금리 변동을 추적합니다. 매일 수집된 데이터를 바탕으로 기본금리와 최대금리가 언제 어떻게 바뀌었는지 확인하세요.</div>', unsafe_allow_html=True)
 
     if hist_df.empty:
         st.warning("추이 데이터를 불러올 수 없습니다.")
     else:
+        # ── 전체 은행 최근 변동 피드 ──
+        st.markdown('<div class="section-title">최근 금리 변동 (전체 은행)</div>', unsafe_allow_html=True)
+        recent_days = st.select_slider(
+            "조회 기간", options=[1, 3, 7, 14, 30], value=7,
+            format_func=lambda d: f"최근 {d}일", key="recent_days",
+        )
+        recent = recent_changes(get_rate_change_events(hist_version, hist_df), hist_df["collected_at"].max(), recent_days)
+        if recent.empty:
+            st.info(f"최근 {recent_days}일 동안 금리 변동이 없습니다.")
+        else:
+            feed = pd.concat([
+                pd.DataFrame({
+                    "은행":         recent["kor_co_nm"].to_numpy(),
+                    "상품명":       recent["fin_prdt_nm"].to_numpy(),
+                    "저축기간(월)": recent["save_trm"].to_numpy(),
+                    "적립방식":     recent["rsrv_type_nm"].astype("string").fillna("-").to_numpy(),
+                }),
+                format_change_table(recent),
+            ], axis=1)
+            st.dataframe(feed, use_container_width=True, height=300)
+            st.caption(f"변동 {len(recent)}건 · {recent['kor_co_nm'].nunique()}개 은행")
+
+        # ── 우리은행 대비 연속 우위 상품 (전체 추이의 일별 금리차에서 계산) ──
+        st.markdown('<div class="section-title">우리은행 대비 연속 우위 상품</div>', unsafe_allow_html=True)
+        with perf.span("history.spreads"):
+            spreads, streaks, spread_pos, streak_pos = get_spreads(hist_version, hist_df)
+        leaders = streaks[streaks["current_streak"] > 0].sort_values(["current_streak", "last_diff"], ascending=False).head(20)
+        if leaders.empty:
+            st.info("현재 우리은행보다 최대금리가 높은 타행 상품이 없습니다.")
+        else:
+            st.dataframe(format_streak_table(leaders), use_container_width=True, height=300)
+            st.caption("같은 상품타입·기간 우리은행 최고 최대금리와 비교 · 수집이 빠진 날은 직전 값으로 채움")
+
+        st.markdown('<div class="section-title">상품별 상세 추이</div>', unsafe_allow_html=True)
+        # 선택지와 선택한 시리즈는 추이 인덱스에서 사전 조회 (선택을 바꿀 때마다 전체 추이를 훑지 않음)
+        hist_options = hist_index["options"]
         col1, col2, col3 = st.columns(3)
         with col1:
-            all_banks_hist = sorted(hist_df["kor_co_nm"].dropna().unique().tolist())
-            sel_bank_hist  = st.selectbox("은행 선택", all_banks_hist, key="hist_bank")
+            sel_bank_hist = st.selectbox("은행 선택", hist_options["banks"], key="hist_bank")
         with col2:
-            products_of_bank = sorted(hist_df[hist_df["kor_co_nm"] == sel_bank_hist]["fin_prdt_nm"].dropna().unique().tolist())
-            sel_prod_hist    = st.selectbox("상품 선택", products_of_bank, key="hist_prod")
+            sel_prod_hist = st.selectbox("상품 선택", hist_options["products"].get(sel_bank_hist, []), key="hist_prod")
         with col3:
-            periods_of_prod = sorted(hist_df[
-                (hist_df["kor_co_nm"] == sel_bank_hist) &
-                (hist_df["fin_prdt_nm"] == sel_prod_hist)
-            ]["save_trm"].dropna().unique().tolist())
-            sel_trm_hist = st.selectbox("저축 기간(개월)", periods_of_prod, key="hist_trm")
-
-        trend_df = hist_df[
-            (hist_df["kor_co_nm"] == sel_bank_hist) &
-            (hist_df["fin_prdt_nm"] == sel_prod_hist) &
-            (hist_df["save_trm"] == sel_trm_hist)
-        ].sort_values("collected_at").reset_index(drop=True)
+            sel_trm_hist = st.selectbox("저축 기간(개월)", hist_options["terms"].get((sel_bank_hist, sel_prod_hist), []), key="hist_trm")
+
+        sel_key  = (sel_bank_hist, sel_prod_hist, sel_trm_hist)
+        trend_df = hist_index["frame"].iloc[hist_index["series"].get(sel_key, [])].reset_index(drop=True)
 
         if trend_df.empty:
             st.info("해당 조건의 데이터가 없습니다.")
         else:
-            trend_df["base_changed"] = trend_df["intr_rate"].diff().ne(0)
-            trend_df["max_changed"]  = trend_df["intr_rate2"].diff().ne(0)
-            trend_df["any_changed"]  = trend_df["base_changed"] | trend_df["max_changed"]
-            changed_df = trend_df[trend_df["any_changed"] & (trend_df.index > 0)]
+            # 선택한 시리즈 하나를 변동 엔진에 그대로 넘김 (직전 수집값 대비 변동 행)
+            changed_df = detect_rate_changes(trend_df, keys=[])
+
+            # 같은 상품타입·기간 우리은행 최고금리와의 일별 금리차 (적립방식이 여럿이면 첫 시리즈)
+            sel_spread = spreads.iloc[spread_pos.get(sel_key, [])]
+            sel_spread = sel_spread[sel_spread["rsrv_type_nm"] == sel_spread["rsrv_type_nm"].iloc[0]] if not sel_spread.empty else sel_spread
+            sel_streak = streaks.iloc[streak_pos.get(sel_key, [])].head(1)
 
             st.markdown('<div class="section-title">날짜별 금리 추이</div>', unsafe_allow_html=True)
-            fig_trend = go.Figure()
-            fig_trend.add_trace(go.Scatter(
-                x=trend_df["collected_at"], y=trend_df["intr_rate"],
-                mode="lines+markers", name="기본금리",
-                line=dict(color="#93c5fd", width=2), marker=dict(size=5),
-            ))
-            fig_trend.add_trace(go.Scatter(
-                x=trend_df["collected_at"], y=trend_df["intr_rate2"],
-                mode="lines+markers", name="최대금리",
-                line=dict(color="#1d4ed8", width=2.5), marker=dict(size=5),
-            ))
-            if len(changed_df) > 0:
-                fig_trend.add_trace(go.Scatter(
-                    x=changed_df["collected_at"], y=changed_df["intr_rate2"],
-                    mode="markers", name="금리 변동 시점",
-                    marker=dict(color="#ef4444", size=12, symbol="star"),
+            with perf.span("figure.trend"):
+                plot_df = compress_steps(trend_df, ["intr_rate", "intr_rate2"])
+                fig_trend = go.Figure()
+                fig_trend.add_trace(scatter(
+                    plot_df["collected_at"], plot_df["intr_rate"],
+                    mode="lines+markers", name="기본금리",
+                    line=dict(color="#93c5fd", width=2), marker=dict(size=5),
                 ))
-            fig_trend.update_layout(
-                plot_bgcolor="white", paper_bgcolor="white",
-                legend=dict(orientation="h", y=1.1, x=1, xanchor="right"),
-                yaxis=dict(ticksuffix="%", gridcolor="#f1f5f9", title="금리 (%)"),
-                xaxis=dict(title="수집 날짜", gridcolor="#f1f5f9"),
-                margin=dict(l=10,r=10,t=30,b=10), height=400,
-            )
+                fig_trend.add_trace(scatter(
+                    plot_df["collected_at"], plot_df["intr_rate2"],
+                    mode="lines+markers", name="최대금리",
+                    line=dict(color="#1d4ed8", width=2.5), marker=dict(size=5),
+                ))
+                if sel_spread["woori_rate"].notna().any():
+                    woori_line = compress_steps(sel_spread, ["woori_rate"])
+                    fig_trend.add_trace(scatter(
+                        woori_line["day"], woori_line["woori_rate"],
+                        mode="lines", name="우리은행 최고금리",
+                        line=dict(color="#64748b", width=2, dash="dot"),
+                    ))
+                if len(changed_df) > 0:
+                    fig_trend.add_trace(scatter(
+                        changed_df["collected_at"], changed_df["intr_rate2"],
+                        mode="markers", name="금리 변동 시점",
+                        marker=dict(color="#ef4444", size=12, symbol="star"),
+                    ))
+                fig_trend.update_layout(
+                    plot_bgcolor="white", paper_bgcolor="white",
+                    legend=dict(orientation="h", y=1.1, x=1, xanchor="right"),
+                    yaxis=dict(ticksuffix="%", gridcolor="#f1f5f9", title="금리 (%)"),
+                    xaxis=dict(title="수집 날짜", gridcolor="#f1f5f9"),
+                    margin=dict(l=10,r=10,t=30,b=10), height=400,
+                )
             st.plotly_chart(fig_trend, use_container_width=True)
 
             # ── 금리 변동 이력 테이블 (이전 수치 → 현재 수치 포함) ──
@@ -470,27 +586,7 @@ with tabs[2]:
             if len(changed_df) == 0:
                 st.info("조회 기간 내 금리 변동 이력이 없습니다.")
             else:
-                change_rows = []
-                for idx in changed_df.index:
-                    prev_idx = idx - 1
-                    curr = trend_df.loc[idx]
-                    prev = trend_df.loc[prev_idx]
-
-                    base_diff = curr["intr_rate"]  - prev["intr_rate"]
-                    max_diff  = curr["intr_rate2"] - prev["intr_rate2"]
-
-                    change_rows.append({
-                        "기준일 (이전)":    prev["collected_at"].strftime("%Y-%m-%d"),
-                        "변동일 (현재)":    curr["collected_at"].strftime("%Y-%m-%d"),
-                        "기본금리 이전(%)": f"{prev['intr_rate']:.2f}%",
-                        "기본금리 현재(%)": f"{curr['intr_rate']:.2f}%",
-                        "기본금리 변동":    f"{'+' if base_diff >= 0 else ''}{base_diff:.2f}%p",
-                        "최대금리 이전(%)": f"{prev['intr_rate2']:.2f}%",
-                        "최대금리 현재(%)": f"{curr['intr_rate2']:.2f}%",
-                        "최대금리 변동":    f"{'+' if max_diff >= 0 else ''}{max_diff:.2f}%p",
-                    })
-
-                change_display = pd.DataFrame(change_rows)
+                change_display = format_change_table(changed_df)
                 st.dataframe(change_display, use_container_width=True, height=250)
 
             # 자동 요약
@@ -499,6 +595,12 @@ with tabs[2]:
             rate_delta = latest_max - first_max
             direction  = "상승" if rate_delta > 0 else ("하락" if rate_delta < 0 else "변동 없음")
             date_range = f"{trend_df['collected_at'].min().strftime('%Y-%m-%d')} ~ {trend_df['collected_at'].max().strftime('%Y-%m-%d')}"
+            streak_note = ""
+            if not sel_streak.empty:
+                sk = sel_streak.iloc[0]
+                streak_note = f"<br>우리은행 대비: 누적 <b>{sk['days_ahead']}일</b> 우위"
+                if sk["current_streak"] > 0:
+                    streak_note += f" · {sk['ahead_since'].strftime('%Y-%m-%d')}부터 <b>{sk['current_streak']}일 연속</b> 우위 ({sk['last_diff']:+.2f}%p)"
 
             st.markdown(f"""
             <div class="insight-box">
@@ -507,36 +609,156 @@ with tabs[2]:
                 조회 기간: <b>{date_range}</b> (총 {len(trend_df)}일 수집)<br>
                 최대금리: <b>{first_max:.2f}%</b> → <b>{latest_max:.2f}%</b>
                 (<b>{'+' if rate_delta >= 0 else ''}{rate_delta:.2f}%p {direction}</b>)<br>
-                금리 변동 횟수: <b>{len(changed_df)}회</b>
+                금리 변동 횟수: <b>{len(changed_df)}회</b>{streak_note}
                 {"· ⚠️ 최근 금리가 상승 중이므로 경쟁력 모니터링이 필요합니다." if rate_delta > 0 else ""}
             </div>
             """, unsafe_allow_html=True)
 
+        # ── 여러 상품 · 기간 비교: 큐브에서 선택한 열만 꺼내 한 타임라인에 겹쳐 그림 ──
+        st.markdown('<div class="section-title">여러 상품 비교</div>', unsafe_allow_html=True)
+        with perf.span("history.rate_cube"):
+            rate_cube = get_rate_cube(hist_version, hist_df)
+        cube_cols = rate_cube.columns
+        cube_terms = sorted({int(t) for t in cube_cols.get_level_values("save_trm").unique()})
+        cmp_col1, cmp_col2 = st.columns([3, 1])
+        with cmp_col1:
+            sel_products = st.multiselect(
+                "비교할 타행 상품 (최대 10개)",
+                [p for p in cube_products(rate_cube) if p[0] != WOORI_BANK],
+                format_func=lambda p: f"{p[0]} · {p[1]}",
+                max_selections=10, key="cmp_products",
+            )
+        with cmp_col2:
+            sel_terms = st.multiselect("저축 기간(개월)", cube_terms, default=[t for t in cube_terms if t == 12] or cube_terms[:1], key="cmp_terms")
+        with_woori = st.checkbox("우리은행 대응 상품 함께 보기", value=True, key="cmp_woori")
+
+        if not sel_products or not sel_terms:
+            st.info("비교할 타행 상품과 저축 기간을 선택하세요.")
+        else:
+            # 비교 데이터에서 선택 상품·기간과 짝지어진 우리은행 상품
+            woori_prods = matching_woori(fdf, COL, sel_products, sel_terms) if with_woori else []
+            cmp_series  = select_series(rate_cube, list(sel_products) + [(WOORI_BANK, p) for p in woori_prods], sel_terms)
+
+            with perf.span("figure.compare"):
+                fig_cmp = go.Figure()
+                for (bank, prod, trm, rsrv), values in cmp_series.items():
+                    line_df  = compress_steps(values.dropna().rename("rate").reset_index(), ["rate"])
+                    is_woori = bank == WOORI_BANK
+                    fig_cmp.add_trace(scatter(
+                        line_df["collected_at"], line_df["rate"],
+                        mode="lines+markers",
+                        name=f"{bank} {prod}{f' ({rsrv})' if rsrv else ''} · {int(trm)}개월",
+                        line=dict(width=3 if is_woori else 2, dash="dot" if is_woori else "solid"),
+                        marker=dict(size=4),
+                    ))
+                fig_cmp.update_layout(
+                    plot_bgcolor="white", paper_bgcolor="white",
+                    legend=dict(orientation="h", y=-0.2, x=0),
+                    yaxis=dict(ticksuffix="%", gridcolor="#f1f5f9", title="최대금리 (%)"),
+                    xaxis=dict(title="수집 날짜", gridcolor="#f1f5f9"),
+                    margin=dict(l=10, r=10, t=30, b=10), height=460,
+                )
+            st.plotly_chart(fig_cmp, use_container_width=True)
+            st.caption(f"시리즈 {cmp_series.shape[1]}개 · 우리은행 대응 상품 {len(woori_prods)}개 (점선)")
+
 # ══════════════════════════════════════════
 # TAB 4: 전체 데이터
 # ══════════════════════════════════════════
-with tabs[3]:
+with tabs[3], perf.span("render.tab_data"):
     st.markdown("### 📋 전체 데이터")
-    st.markdown('<div class="desc-box">필터가 적용된 전체 데이터를 확인하고 CSV로 다운로드할 수 있습니다.</div>', unsafe_allow_html=True)
-
-    display_cols = list(COL.values())
-    rename_map = {v: k for v, k in zip(display_cols, [
-        "상품타입", "우리은행상품", "저축기간(월)", "타행명", "타행상품명",
-        "우리 기본금리", "우리 최대금리", "타행 기본금리", "타행 최대금리",
-        "금리차(%p)", "우대조건"
-    ])}
-    styled_df = (
-        fdf[display_cols].rename(columns=rename_map)
-        .sort_values("금리차(%p)", ascending=False)
-        .reset_index(drop=True)
-    )
+    st.markdown('<div class="desc-box">필터가 적용된 전체 데이터를 확인하고 CSV / Parquet 파일로 내려받을 수 있습니다. 전체 금리 이력도 기간을 골라 내려받을 수 있습니다.</div>', unsafe_allow_html=True)
+
+    styled_df = derived["styled_df"]
+
+    # ── 페이지 단위 표: 정렬은 서버에서, 현재 페이지 행만 전송 (Styler 대신 column_config 숫자 포맷) ──
+    pg1, pg2, pg3 = st.columns([2, 1, 1])
+    with pg1:
+        sort_desc = st.radio("정렬", ["금리차 높은 순", "금리차 낮은 순"], horizontal=True, key="grid_sort") == "금리차 높은 순"
+    with pg2:
+        page_size = st.selectbox("페이지당 행 수", [50, 100, 200, 500], index=1, key="grid_page_size")
+    n_pages = max(1, -(-len(styled_df) // page_size))
+    # 필터 변경으로 페이지 수가 줄면 마지막 페이지로
+    if st.session_state.get("grid_page", 1) > n_pages:
+        st.session_state["grid_page"] = n_pages
+    with pg3:
+        page = st.number_input("페이지", min_value=1, max_value=n_pages, step=1, key="grid_page")
+
+    # styled_df 는 금리차 내림차순으로 캐시되어 있으므로 오름차순은 뒤집기만 함
+    ordered   = styled_df if sort_desc else styled_df.iloc[::-1]
+    start_row = (page - 1) * page_size
+    page_df   = ordered.iloc[start_row:start_row + page_size]
+
+    rate_fmt = st.column_config.NumberColumn(format="%.2f%%")
     st.dataframe(
-        styled_df.style.format({
-            "우리 기본금리": "{:.2f}%", "우리 최대금리": "{:.2f}%",
-            "타행 기본금리": "{:.2f}%", "타행 최대금리": "{:.2f}%",
-            "금리차(%p)": "+{:.2f}%p",
-        }),
-        use_container_width=True, height=500,
+        page_df,
+        column_config={
+            "우리 기본금리": rate_fmt, "우리 최대금리": rate_fmt,
+            "타행 기본금리": rate_fmt, "타행 최대금리": rate_fmt,
+            "금리차(%p)": st.column_config.NumberColumn(format="+%.2f%%p"),
+        },
+        hide_index=True, use_container_width=True, height=500,
     )
-    csv = styled_df.to_csv(index=False).encode("utf-8-sig")
-    st.download_button("⬇️ CSV 다운로드", csv, "bank_rate_comparison.csv", "text/csv")
+    st.caption(f"총 {len(styled_df):,}건 중 {start_row + 1:,}–{start_row + len(page_df):,}건 · {page}/{n_pages} 페이지")
+
+    # ── 내보내기: 버튼을 눌렀을 때만 임시 파일에 청크 단위로 생성 ──
+    st.markdown('<div class="section-title">⬇️ 내보내기</div>', unsafe_allow_html=True)
+    export_fmt = st.radio("파일 형식", list(EXPORT_FORMATS), horizontal=True, key="export_fmt")
+
+    def offer_download(chunks, base_name, label, key):
+        # 버튼을 누른 실행에서만 파일을 만들고 다운로드 버튼을 그린다 (이후 재실행마다 파일을 다시 읽지 않음)
+        # download_button 이 내용을 넘겨받으면 임시 파일은 바로 지운다
+        ext, mime, _ = EXPORT_FORMATS[export_fmt]
+        name = f"{base_name}.{ext}"
+        path = export_file(chunks, export_fmt)
+        try:
+            with open(path, "rb") as f:
+                st.download_button(f"⬇️ {label} ({name})", f, name, mime, key=key)
+        finally:
+            remove_export(path)
+
+    ex1, ex2 = st.columns(2)
+    with ex1:
+        st.caption("현재 필터가 적용된 비교 데이터")
+        if st.button("📄 비교 데이터 파일 만들기", key="export_cmp_btn"):
+            offer_download(frame_chunks(styled_df), "bank_rate_comparison", "비교 데이터 다운로드", "export_cmp_dl")
+    with ex2:
+        st.caption("수집된 전체 금리 이력 (finance_data)")
+        hist_end   = hist_df["collected_at"].max().date() if not hist_df.empty else datetime.now().date()
+        hist_start = hist_df["collected_at"].min().date() if not hist_df.empty else hist_end
+        export_range = st.date_input("수집 기간", value=(max(hist_start, hist_end - timedelta(days=30)), hist_end), key="export_hist_range")
+        if st.button("🗂️ 이력 파일 만들기", key="export_hist_btn"):
+            if len(export_range) != 2:
+                st.warning("시작일과 종료일을 모두 선택해주세요.")
+            else:
+                with st.spinner("이력 데이터를 내려받는 중..."):
+                    try:
+                        offer_download(
+                            history_chunks(supabase, *export_range),
+                            f"finance_data_{export_range[0]:%Y%m%d}_{export_range[1]:%Y%m%d}",
+                            "이력 다운로드", "export_hist_dl",
+                        )
+                    except Exception as e:
+                        st.error(f"이력 내보내기 실패: {e}")
+
+# ─────────────────────────────────────────
+# 성능 계측 기록 / 관리자 패널
+# ─────────────────────────────────────────
+derived_cache = get_derived_cache()
+perf_record = perf.record({
+    **datasets.counters(),
+    "derived_hits":   derived_cache.hits,
+    "derived_misses": derived_cache.misses,
+    "derived_mb":     round(derived_cache.nbytes / 1024 / 1024, 2),
+})
+emit(perf_record)
+
+if st.query_params.get("admin") == "1":
+    with st.sidebar.expander("⏱️ 성능 계측", expanded=False):
+        st.caption(f"이번 rerun 전체 {perf_record['total_ms']:.0f} ms")
+        st.dataframe(
+            pd.DataFrame(
+                [{"구간": name, "횟수": count, "합계(ms)": round(total, 1)} for name, (count, total) in perf.summary().items()]
+            ),
+            hide_index=True, use_container_width=True,
+        )
+        st.json(perf_record["counters"])
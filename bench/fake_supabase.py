@@ -0,0 +1,193 @@
+"""오프라인 Supabase 대용 클라이언트와 합성 금리 데이터
+
+N 개 타행(+우리은행) × M 개 상품 × 6 개 기간(PERIOD_ORDER) × D 일 스냅샷을 만들고,
+앱이 쓰는 PostgREST 호출(table().select().order().gt()/gte()/lt()/eq().limit()/range(),
+rpc("get_new_better_products_v3"))만 흉내 낸다. 데이터는 DataFrame 으로 들고 있다가
+응답할 페이지만 dict 로 바꾸므로 수십만 행에서도 가볍게 동작한다.
+"""
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from postgrest.exceptions import APIError
+
+from monitor.history_store import HISTORY_FIELDS, HISTORY_TABLE
+from monitor.transforms import PERIOD_ORDER
+
+WOORI = "우리은행"
+BASE_RPC = "get_new_better_products_v3"
+
+
+def make_history(n_banks=10, n_products=5, n_days=30, change_prob=0.02, seed=0, start=datetime(2025, 1, 1, 9)):
+    """finance_data 형태의 합성 추이 (collected_at 은 ISO 문자열, 오름차순)
+
+    상품 절반은 rsrv_type_nm 컬럼으로, 나머지 일부는 상품명 괄호로 적립 방식을 표시한다.
+    금리는 계단 함수: 시리즈마다 하루 change_prob 확률로 ±0.05~0.2%p 변동.
+    """
+    rng   = np.random.default_rng(seed)
+    banks = [WOORI] + [f"타행{i:02d}" for i in range(n_banks)]
+
+    series = []
+    for bank in banks:
+        for p in range(n_products):
+            style = p % 3   # 0: rsrv_type_nm 컬럼, 1: 상품명 괄호, 2: 적립 방식 없음(일반)
+            for rsrv in (("자유적립식", "정액적립식") if style != 2 else (None,)):
+                name = f"{bank} 적금{p}" + (f"({rsrv})" if style == 1 else "")
+                for trm in PERIOD_ORDER:
+                    series.append((bank, name, trm, rsrv if style == 0 else None))
+    meta = pd.DataFrame(series, columns=["kor_co_nm", "fin_prdt_nm", "save_trm", "rsrv_type_nm"])
+    n_series = len(meta)
+
+    base  = 2.5 + rng.random(n_series) * 1.5 + meta["save_trm"].to_numpy() / 100
+    steps = np.where(rng.random((n_days, n_series)) < change_prob, rng.choice([-0.2, -0.1, -0.05, 0.05, 0.1, 0.2], (n_days, n_series)), 0.0)
+    steps[0] = 0.0
+    max_rate  = np.round(base + steps.cumsum(axis=0), 2)
+    base_rate = np.round(max_rate - 0.5, 2)
+
+    days = [(start + timedelta(days=d)).isoformat() + "+00:00" for d in range(n_days)]
+    df = pd.concat([meta] * n_days, ignore_index=True)
+    df.insert(0, "collected_at", np.repeat(days, n_series))
+    df["intr_rate"]    = base_rate.ravel()
+    df["intr_rate2"]   = max_rate.ravel()
+    df["spcl_cnd"]     = "급여이체 시 우대"
+    df["product_type"] = "적금"
+    return df[HISTORY_FIELDS]
+
+
+def make_comparison(history):
+    """마지막 스냅샷에서 같은 기간 우리은행 상품보다 최대금리가 높은 타행 상품 쌍 (v3 컬럼 순서)"""
+    snap  = history[history["collected_at"] == history["collected_at"].max()]
+    woori = snap[snap["kor_co_nm"] == WOORI]
+    other = snap[snap["kor_co_nm"] != WOORI]
+    pairs = other.merge(woori, on=["save_trm", "product_type"], suffixes=("", "_w"))
+    pairs = pairs[pairs["intr_rate2"] > pairs["intr_rate2_w"]]
+    return pd.DataFrame({
+        "product_type":     pairs["product_type"],
+        "woori_prdt_nm":    pairs["fin_prdt_nm_w"],
+        "save_trm":         pairs["save_trm"],
+        "kor_co_nm":        pairs["kor_co_nm"],
+        "fin_prdt_nm":      pairs["fin_prdt_nm"],
+        "woori_intr_rate":  pairs["intr_rate_w"],
+        "woori_intr_rate2": pairs["intr_rate2_w"],
+        "intr_rate":        pairs["intr_rate"],
+        "intr_rate2":       pairs["intr_rate2"],
+        "rate_diff":        (pairs["intr_rate2"] - pairs["intr_rate2_w"]).round(2),
+        "spcl_cnd":         pairs["spcl_cnd"],
+    }).reset_index(drop=True)
+
+
+class _Response(SimpleNamespace):
+    pass
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client  = client
+        self.table   = table
+        self.columns = None
+        self.filters = []        # (연산, 컬럼, 값)
+        self.orders  = []
+        self.size    = None
+        self.span    = None
+
+    def select(self, columns):
+        self.columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def _filter(self, op, column, value):
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def order(self, column, *, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def range(self, start, end):
+        # postgrest-py 0.11 과 같이 end 는 제외
+        self.span = (start, end)
+        return self
+
+    def execute(self):
+        self.client.requests += 1
+        time.sleep(self.client.latency)
+        if self.table != HISTORY_TABLE:
+            raise APIError({"code": "PGRST205", "message": f"Could not find the table 'public.{self.table}'"})
+        df   = self.client.history
+        keys = df["collected_at"].to_numpy()
+        lo, hi = 0, len(df)
+        rest = []
+        # collected_at 조건은 정렬된 배열에서 이분 탐색
+        for op, column, value in self.filters:
+            if column != "collected_at":
+                rest.append((op, column, value))
+            elif op == "eq":
+                lo = max(lo, np.searchsorted(keys, value, "left"))
+                hi = min(hi, np.searchsorted(keys, value, "right"))
+            elif op in ("gt", "gte"):
+                lo = max(lo, np.searchsorted(keys, value, "right" if op == "gt" else "left"))
+            else:
+                hi = min(hi, np.searchsorted(keys, value, "left" if op == "lt" else "right"))
+        out = df.iloc[lo:hi] if hi > lo else df.iloc[0:0]
+        for op, column, value in rest:
+            out = out[out[column] == value] if op == "eq" else out
+        if self.orders and self.orders != [("collected_at", False)]:
+            # collected_at 오름차순은 이미 정렬된 상태
+            out = out.sort_values([c for c, _ in self.orders], ascending=[not d for _, d in self.orders], kind="stable")
+        if self.span is not None:
+            out = out.iloc[self.span[0]:self.span[1]]
+        if self.size is not None:
+            out = out.iloc[:self.size]
+        out = out.iloc[:self.client.max_rows]
+        if self.columns:
+            out = out[self.columns]
+        return _Response(data=out.astype(object).where(out.notna(), None).to_dict("records"))
+
+
+class _RPC:
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return _Response(data=self.data)
+
+
+class FakeSupabase:
+    """앱이 쓰는 supabase 클라이언트 메서드만 구현. 추가 RPC/테이블은 미배포(PGRST202/PGRST205)로 응답"""
+
+    def __init__(self, history, comparison=None, max_rows=1000, latency=0.0):
+        self.history    = history.sort_values("collected_at", kind="stable").reset_index(drop=True)
+        self.comparison = make_comparison(self.history) if comparison is None else comparison
+        self.max_rows   = max_rows
+        self.latency    = latency   # 요청당 네트워크 왕복 흉내 (초)
+        self.requests   = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        self.requests += 1
+        time.sleep(self.latency)
+        if name == BASE_RPC:
+            return _RPC(self.comparison.to_dict("records"))
+        raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{name}"})
@@ -0,0 +1,105 @@
+"""오프라인 벤치마크: 합성 데이터로 로드/필터/중복제거/피벗/변동 감지/상품별 조회를 잰다.
+
+    python -m bench.run_bench                       # 기본 규모 단계
+    python -m bench.run_bench --scales 10x5x30 40x10x365 --json out.json
+
+규모는 "타행 수 x 상품 수 x 일수" 형식이며 기간은 PERIOD_ORDER 6개로 고정이다.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from bench.fake_supabase import FakeSupabase, make_history
+from monitor.charts import compress_steps
+from monitor.comparison_query import fetch_comparison
+from monitor.history_index import build_history_index, product_history
+from monitor.history_store import FETCH_WORKERS, history_columns, sync_history
+from monitor.rate_changes import detect_rate_changes
+from monitor.rate_cube import build_rate_cube, cube_products, select_series
+from monitor.spreads import build_spreads, spread_streaks
+from monitor.transforms import PERIOD_ORDER, dedup_products, derive_frames, filter_comparison
+
+DEFAULT_SCALES = ["10x5x30", "20x10x90", "40x10x365"]
+
+# 상품 상세 탭처럼 앞쪽 몇 개 상품만 조회
+LOOKUPS = 50
+
+
+def parse_scale(text):
+    banks, products, days = (int(v) for v in text.lower().split("x"))
+    return banks, products, days
+
+
+def _timed(results, name, fn):
+    t0 = time.perf_counter()
+    value = fn()
+    results[name] = round((time.perf_counter() - t0) * 1000, 2)
+    return value
+
+
+def run_scale(banks, products, days, latency=0.0, workers=FETCH_WORKERS):
+    """한 규모에서 단계별 소요 시간(ms)과 행 수"""
+    history = make_history(banks, products, days)
+    client  = FakeSupabase(history, latency=latency)
+    columns = history_columns()
+    res = {"scale": f"{banks}x{products}x{days}", "rows": len(history)}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        hist = _timed(res, "sync_cold_ms", lambda: sync_history(client, cache_dir, columns=columns, workers=workers))
+        res["requests"] = client.requests
+        _timed(res, "sync_warm_ms", lambda: sync_history(client, cache_dir, columns=columns, workers=workers))
+    res["hist_mb"] = round(hist.memory_usage(deep=True).sum() / 2**20, 2)
+
+    cmp_df = _timed(res, "fetch_comparison_ms", lambda: fetch_comparison(client))
+    res["comparison_rows"] = len(cmp_df)
+    periods = PERIOD_ORDER[2:]
+    fdf = _timed(res, "filter_ms", lambda: filter_comparison(cmp_df, periods=periods))
+    _timed(res, "dedup_ms", lambda: dedup_products(fdf))
+    _timed(res, "derive_frames_ms", lambda: derive_frames(fdf))
+
+    _timed(res, "detect_changes_ms", lambda: detect_rate_changes(hist))
+    spreads = _timed(res, "spreads_ms", lambda: build_spreads(hist))
+    _timed(res, "streaks_ms", lambda: spread_streaks(spreads))
+    index = _timed(res, "build_index_ms", lambda: build_history_index(hist))
+    keys  = list(index["groups"])[:LOOKUPS]
+    groups = _timed(res, f"lookup_{LOOKUPS}_ms", lambda: [product_history(index, *k) for k in keys])
+
+    # 여러 상품 비교: 큐브 한 번 펼친 뒤 상품 10개 × 기간 3개 열 슬라이스
+    cube = _timed(res, "build_cube_ms", lambda: build_rate_cube(hist))
+    picks = cube_products(cube)[:10]
+    _timed(res, "cube_select_ms", lambda: select_series(cube, picks, PERIOD_ORDER[2:5]))
+
+    # 상품 상세 그래프: 기간 × 적립방식 시리즈별 변동 지점 축소
+    series = [s for g in groups for _, s in g.groupby(["_deposit_type", "save_trm"], observed=True)]
+    plotted = _timed(res, "compress_ms", lambda: [compress_steps(s, ["intr_rate2"]) for s in series])
+    res["points"]      = sum(len(s) for s in series)
+    res["points_kept"] = sum(len(s) for s in plotted)
+    return res
+
+
+def print_table(results):
+    cols   = list(results[0])
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in results)) for c in cols]
+    print("  ".join(c.rjust(w) for c, w in zip(cols, widths)))
+    for r in results:
+        print("  ".join(str(r.get(c, "")).rjust(w) for c, w in zip(cols, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, help="타행x상품x일수")
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연(초) — 네트워크 왕복 흉내")
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS, help="전체 동기화 동시 구간 수")
+    parser.add_argument("--json", help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args(argv)
+
+    results = [run_scale(*parse_scale(s), latency=args.latency, workers=args.workers) for s in args.scales]
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""화면 없이 경쟁 위협을 평가하는 알림 작업
+
+수집 직후 실행:
+
+    python -m monitor.alerts                   # 새 수집분이 없으면 바로 종료
+    python -m monitor.alerts --table competitiveness_alerts
+
+finance_data 의 마지막 수집 시각이 직전 실행과 같으면 아무것도 받지 않는다.
+새 수집분이 있으면 비교 데이터(get_new_better_products_v3)에 대시보드와 같은 기준
+(transforms.HIGH_RISK_THRESHOLD, headline_stats)을 적용하고, 직전 실행의 위협 목록과 비교해
+새로 생긴 위협 / 금리차가 커진 위협 / 가장 위협적인 상품 변경을 알림 레코드로 남긴다.
+평가 후 같은 수집분의 경쟁력 요약 스냅샷(monitor.snapshots)도 저장해 대시보드 첫 화면이 쓰게 한다.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from monitor.comparison_query import fetch_comparison
+from monitor.history_store import CACHE_DIR, latest_collected_at
+from monitor.snapshots import materialize
+from monitor.transforms import HIGH_RISK_THRESHOLD, comparison_columns, headline_stats
+
+ALERT_LOG_PATH = Path(os.environ.get("ALERT_LOG_PATH", CACHE_DIR / "alerts.jsonl"))
+STATE_PATH     = Path(os.environ.get("ALERT_STATE_PATH", CACHE_DIR / "alerts.state.json"))
+
+# 직전 실행보다 금리차가 이만큼 이상 커지면 '악화' 로 본다 (%p)
+WORSEN_STEP = 0.05
+
+
+def _key(*parts):
+    return "\t".join(str(p) for p in parts)
+
+
+def threat_map(fdf, threshold=HIGH_RISK_THRESHOLD):
+    """{위협 키: 레코드} — 금리차가 threshold 이상인 (우리은행 상품, 기간, 타행, 타행 상품)"""
+    if fdf.empty:
+        return {}
+    col  = comparison_columns(fdf)
+    hits = fdf[fdf[col["rate_diff"]] >= threshold]
+    records = zip(
+        hits[col["woori_prod"]], hits[col["period"]], hits[col["bank"]], hits[col["bank_prod"]], hits[col["rate_diff"]],
+    )
+    return {
+        _key(woori, trm, bank, prod): {
+            "woori_prdt_nm": woori, "save_trm": int(trm), "kor_co_nm": bank, "fin_prdt_nm": prod,
+            "rate_diff": round(float(diff), 2),
+        }
+        for woori, trm, bank, prod, diff in records
+    }
+
+
+def evaluate(fdf, previous, threshold=HIGH_RISK_THRESHOLD):
+    """(알림 레코드 목록, 이번 실행 상태) — previous 는 직전 실행 상태 (없으면 빈 dict)"""
+    threats   = threat_map(fdf, threshold)
+    prev_diff = previous.get("threats", {})
+    alerts = []
+    for key, rec in threats.items():
+        before = prev_diff.get(key)
+        if before is None:
+            alerts.append({"kind": "new", **rec, "prev_rate_diff": None})
+        elif rec["rate_diff"] >= before + WORSEN_STEP:
+            alerts.append({"kind": "worsened", **rec, "prev_rate_diff": before})
+
+    stats = headline_stats(fdf)
+    top   = None
+    if stats["top_bank"] is not None:
+        top = {"kor_co_nm": stats["top_bank"], "fin_prdt_nm": stats["top_prod"], "rate_diff": round(float(stats["max_diff"]), 2)}
+        prev_top = previous.get("top")
+        if prev_top and (prev_top["kor_co_nm"], prev_top["fin_prdt_nm"]) != (top["kor_co_nm"], top["fin_prdt_nm"]):
+            alerts.append({"kind": "top_changed", **top, "prev_rate_diff": prev_top["rate_diff"]})
+
+    alerts.sort(key=lambda a: a["rate_diff"], reverse=True)
+    state = {
+        "threats": {key: rec["rate_diff"] for key, rec in threats.items()},
+        "top": top,
+        "high_risk": stats["high_risk"],
+    }
+    return alerts, state
+
+
+def _read_state(path):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(path, state):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_alerts(alerts, path=ALERT_LOG_PATH, client=None, table=None):
+    """JSON-lines 파일에 이어 쓰고, table 을 주면 Supabase 테이블에도 넣는다"""
+    if not alerts:
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for alert in alerts:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+    if table:
+        client.table(table).insert(alerts).execute()
+
+
+def run(client, state_path=STATE_PATH, log_path=ALERT_LOG_PATH, table=None, threshold=HIGH_RISK_THRESHOLD, force=False):
+    """한 번 평가하고 실행 요약을 반환. 새 수집분이 없으면 비교 데이터를 받지 않는다"""
+    t0       = time.perf_counter()
+    previous = _read_state(state_path)
+    latest   = latest_collected_at(client)
+    summary  = {"collected_at": latest, "evaluated": False, "alerts": 0}
+
+    if latest is not None and (force or latest != previous.get("collected_at")):
+        alerts, state = evaluate(fetch_comparison(client), previous, threshold)
+        ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        alerts = [{"ts": ts, "collected_at": latest, **a} for a in alerts]
+        write_alerts(alerts, log_path, client, table)
+        _write_state(state_path, {"collected_at": latest, **state})
+        summary.update(evaluated=True, alerts=len(alerts), high_risk=state["high_risk"], top=state["top"])
+        # 알림/상태를 남긴 뒤 스냅샷 저장 (sql/competitiveness_snapshots.sql 미배포 시 None)
+        summary["snapshot_date"] = materialize(client, threshold=threshold)
+
+    summary["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return summary
+
+
+def _client_from_env():
+    """SUPABASE_URL / SUPABASE_KEY 환경 변수, 없으면 .streamlit/secrets.toml"""
+    from supabase import create_client
+
+    url, key = os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY")
+    if not (url and key):
+        import tomllib
+        with open(Path(".streamlit") / "secrets.toml", "rb") as f:
+            secrets = tomllib.load(f)
+        url, key = secrets["SUPABASE_URL"], secrets["SUPABASE_KEY"]
+    return create_client(url, key)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="수집 직후 경쟁 위협 알림 평가")
+    parser.add_argument("--threshold", type=float, default=HIGH_RISK_THRESHOLD, help="고위험 금리차 기준 (%%p)")
+    parser.add_argument("--log", default=str(ALERT_LOG_PATH), help="알림 JSON-lines 파일")
+    parser.add_argument("--state", default=str(STATE_PATH), help="직전 실행 상태 파일")
+    parser.add_argument("--table", help="알림을 함께 넣을 Supabase 테이블")
+    parser.add_argument("--force", action="store_true", help="새 수집분이 없어도 다시 평가")
+    args = parser.parse_args(argv)
+
+    summary = run(_client_from_env(), args.state, args.log, args.table, args.threshold, args.force)
+    print(json.dumps(summary, ensure_ascii=False, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
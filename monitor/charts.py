@@ -0,0 +1,37 @@
+"""추이 그래프용 데이터 축소와 trace 선택
+
+금리는 드물게 바뀌는 계단 함수라 매일 수집된 점 대부분이 중복이다.
+시리즈마다 값이 바뀌는 지점의 앞뒤 점(과 양 끝점)만 남기면 선 모양은 그대로이고
+전송/렌더링할 점 수는 변동 횟수에 비례하게 줄어든다.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+# 이 개수를 넘는 trace 는 SVG 대신 WebGL(Scattergl)로 그린다
+SCATTERGL_MIN_POINTS = 1000
+
+
+def compress_steps(df, value_cols):
+    """한 시리즈에서 값이 바뀌는 지점의 앞뒤 행과 양 끝 행만 남긴다
+
+    행 순서를 그대로 쓰므로 호출 측에서 x 축(수집 시각/날짜) 순으로 정렬해 넘긴다.
+    """
+    if len(df) <= 2:
+        return df
+    keep = np.zeros(len(df), dtype=bool)
+    keep[0] = keep[-1] = True
+    for col in value_cols:
+        values = df[col].reset_index(drop=True)
+        same_as_prev = values.eq(values.shift(1)) | (values.isna() & values.shift(1).isna())
+        change = ~same_as_prev.to_numpy()
+        change[0] = False
+        # 바뀐 행과 그 직전 행 (직전 행이 있어야 선이 계단 모양을 유지)
+        keep |= change
+        keep[:-1] |= change[1:]
+    return df[keep]
+
+
+def scatter(x, y, **kwargs):
+    """점 수에 따라 go.Scatter / go.Scattergl 중 하나를 만든다"""
+    trace = go.Scattergl if len(x) > SCATTERGL_MIN_POINTS else go.Scatter
+    return trace(x=x, y=y, **kwargs)
@@ -0,0 +1,114 @@
+"""비교 데이터 조회 계층
+
+사이드바 선택값을 RPC 파라미터로 넘겨 필터링/집계를 서버(sql/comparison_filters.sql)에서 수행한다.
+해당 RPC 가 아직 배포되지 않은 환경에서는 기존 get_new_better_products_v3 전체 조회 +
+클라이언트 필터로 동작한다. 컬럼은 기존과 같이 v3 반환 순서(위치)로 해석한다.
+"""
+import pandas as pd
+from postgrest.exceptions import APIError
+
+from monitor.transforms import comparison_columns, filter_comparison
+
+BASE_RPC     = "get_new_better_products_v3"
+FACETS_RPC   = "get_comparison_facets"
+FILTERED_RPC = "get_new_better_products_filtered"
+HEATMAP_RPC  = "get_rate_diff_heatmap"
+VULN_RPC     = "get_woori_vuln_counts"
+
+# RPC 미배포 시 PostgREST 가 돌려주는 오류 코드
+_MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+# sql/comparison_filters.sql 로 함께 배포되는 RPC — 하나가 없으면 나머지도 없다고 본다
+FILTER_RPCS = {FACETS_RPC, FILTERED_RPC, HEATMAP_RPC, VULN_RPC}
+
+# 이 프로세스에서 없다고 확인된 RPC (매 조회마다 실패 요청을 다시 보내지 않음)
+_missing_rpcs = set()
+
+
+def _rpc_or_none(client, name, params):
+    """RPC 호출 결과, 함수가 없으면 None"""
+    if name in _missing_rpcs:
+        return None
+    try:
+        return client.rpc(name, params).execute().data
+    except APIError as e:
+        if e.code in _MISSING_FUNCTION_CODES:
+            _missing_rpcs.update(FILTER_RPCS if name in FILTER_RPCS else {name})
+            return None
+        raise
+
+
+def forget_missing_rpcs():
+    """수동 새로고침 때 다시 확인 (SQL 을 나중에 배포한 경우)"""
+    _missing_rpcs.clear()
+
+
+def filter_param(selected, options):
+    """전체 선택이면 None(서버 필터 생략), 아니면 선택값 tuple (캐시 키로 사용)"""
+    selected = tuple(selected)
+    return None if set(selected) >= set(options) else selected
+
+
+def _params(types, periods, banks):
+    return {
+        "p_types":   None if types   is None else list(types),
+        "p_periods": None if periods is None else [int(p) for p in periods],
+        "p_banks":   None if banks   is None else list(banks),
+    }
+
+
+def fetch_base(client):
+    """get_new_better_products_v3 전체 — 필터 RPC 미배포 시 로컬 필터의 원본"""
+    return pd.DataFrame(client.rpc(BASE_RPC, {}).execute().data)
+
+
+def fetch_facets(client, load_base=None):
+    """필터 선택지 {"types": [...], "periods": [...], "banks": [...]}
+
+    load_base: RPC 가 없을 때 v3 전체를 돌려주는 함수 (호출 측 캐시 재사용). 기본은 fetch_base
+    """
+    data = _rpc_or_none(client, FACETS_RPC, {})
+    if data is not None:
+        return {k: list(data.get(k) or []) for k in ("types", "periods", "banks")}
+
+    df = load_base() if load_base else fetch_base(client)
+    if df.empty:
+        return {"types": [], "periods": [], "banks": []}
+    col = comparison_columns(df)
+    return {
+        "types":   sorted(df[col["type"]].dropna().unique()),
+        "periods": sorted(df[col["period"]].dropna().unique()),
+        "banks":   sorted(df[col["bank"]].dropna().unique()),
+    }
+
+
+def fetch_comparison(client, types=None, periods=None, banks=None, load_base=None):
+    """필터가 적용된 비교 행 (None 인 필터는 전체). RPC 가 없으면 v3 전체를 로컬에서 필터"""
+    data = _rpc_or_none(client, FILTERED_RPC, _params(types, periods, banks))
+    if data is not None:
+        return pd.DataFrame(data)
+    df = load_base() if load_base else fetch_base(client)
+    return filter_comparison(df, types, periods, banks)
+
+
+def fetch_rate_diff_heatmap(client, columns, types=None, periods=None, banks=None):
+    """서버 집계 히트맵. RPC 가 없으면 None — 호출 측에서 transforms.rate_diff_heatmap 으로 대체"""
+    data = _rpc_or_none(client, HEATMAP_RPC, _params(types, periods, banks))
+    if data is None:
+        return None
+    return pd.DataFrame(data, columns=["kor_co_nm", "save_trm", "rate_diff"]).set_axis(list(columns), axis=1)
+
+
+def fetch_vuln_counts(client, columns, types=None, periods=None, banks=None):
+    """서버 집계 경쟁 상품 수. RPC 가 없으면 None — 호출 측에서 transforms.vuln_counts 로 대체"""
+    data = _rpc_or_none(client, VULN_RPC, _params(types, periods, banks))
+    if data is None:
+        return None
+    return pd.DataFrame(data, columns=["woori_prdt_nm", "save_trm", "cnt"]).set_axis(list(columns), axis=1)
+
+
+def comparison_version(df):
+    """비교 데이터 내용 해시 — 로더 캐시 안에서 한 번만 계산해 파생 캐시 키로 쓴다"""
+    if df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
@@ -0,0 +1,337 @@
+"""프로세스 공유 데이터셋과 버전 관리
+
+새로고침이 모든 캐시를 지우는 대신 데이터셋별로 필요한 만큼만 다시 받도록 한다.
+- 추이 데이터: 메모리 사본 + watermark. 갱신은 watermark 이후 행만 받아 붙인다.
+- 비교 데이터: 필터 조합별 스냅샷. 새로고침은 epoch 를 올려 다음 조회 때 다시 받게 한다.
+
+BackgroundRefresher 가 TTL 만료 전에 두 데이터셋을 미리 갱신하고,
+갱신 중에도 조회 측은 이전 스냅샷을 그대로 받는다 (참조 교체 한 번으로 스냅샷 전환).
+shared=True 이면 같은 호스트의 프로세스들이 추이 데이터 로컬 사본을 공유한다 (monitor.shared_cache).
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from monitor.comparison_query import (
+    comparison_version, fetch_base, fetch_comparison, fetch_facets, fetch_rate_diff_heatmap, fetch_vuln_counts,
+    forget_missing_rpcs,
+)
+from monitor.history_store import (
+    CACHE_DIR, DEFAULT_DROP_COLUMNS, history_columns, latest_collected_at, load_local, read_meta, sync_increment,
+)
+from monitor.shared_cache import SHARED_POLL_SECONDS, RefresherLock
+from monitor.snapshots import collection_date, current_summaries, fetch_snapshot_frames, fetch_summaries
+
+DEFAULT_TTL = 300
+
+# 데이터셋 동시 로드 상한 (워밍/화면 조회가 같은 풀을 쓴다)
+LOAD_WORKERS = 4
+
+# 사이드바 전체 선택 (서버 필터 없음) — 첫 화면 기본값이라 미리 받아 둔다
+ALL_FILTERS = (None, None, None)
+
+_MISSING = object()
+
+# 공유 모드에서 첫 세대 파일이 나타나길 기다리는 최대 시간 (초)
+SHARED_FIRST_WAIT = 60
+
+
+class HistoryDataset:
+    def __init__(self, client, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, drop_columns=DEFAULT_DROP_COLUMNS, shared=False):
+        self.client     = client
+        self.cache_dir  = cache_dir
+        self.columns    = history_columns(drop_columns)
+        self.ttl        = ttl
+        self.df         = None
+        self.watermark  = None
+        self.generation = None   # 마지막으로 읽거나 쓴 로컬 사본 세대
+        self.synced_at  = 0.0
+        self.syncs      = 0
+        self.last_new   = 0   # 마지막 동기화에서 받은 새 행 수
+        self._lock      = threading.Lock()
+        # 공유 모드: 잠금을 잡은 프로세스만 Supabase 와 동기화하고 나머지는 디스크 사본을 따라 읽는다
+        self.refresher  = RefresherLock(cache_dir) if shared else None
+
+    @property
+    def age(self):
+        return time.monotonic() - self.synced_at
+
+    @property
+    def is_writer(self):
+        return self.refresher is None or self.refresher.held
+
+    def _sync(self):
+        if self.refresher is not None and not self.refresher.try_acquire():
+            return self._follow()
+        local, watermark = self.df, self.watermark
+        if local is None:
+            local, watermark = load_local(self.cache_dir, self.columns)
+        df, watermark, n_new = sync_increment(self.client, local, watermark, self.cache_dir, self.columns)
+        # 참조 교체 한 번으로 읽는 쪽은 항상 완성된 스냅샷만 본다
+        self.df, self.watermark = df, watermark
+        self.generation = (read_meta(self.cache_dir) or {}).get("generation")
+        self.synced_at  = time.monotonic()
+        self.syncs     += 1
+        self.last_new   = n_new
+        return n_new
+
+    def _follow(self):
+        """갱신 담당 프로세스가 쓴 새 세대가 있으면 읽어 교체 (Supabase 요청 없음). 늘어난 행 수를 반환"""
+        deadline = time.monotonic() + SHARED_FIRST_WAIT
+        n_new = 0
+        while True:
+            meta = read_meta(self.cache_dir)
+            if meta is not None and meta.get("generation") != self.generation:
+                df, watermark = load_local(self.cache_dir, self.columns, meta)
+                if df is not None:
+                    n_new = len(df) - (0 if self.df is None else len(self.df))
+                    self.df, self.watermark, self.generation = df, watermark, meta.get("generation")
+            if self.df is not None:
+                break
+            # 첫 세대가 아직 없으면 담당 프로세스의 첫 동기화를 기다린다 (담당자가 없어졌으면 이어받음)
+            if time.monotonic() > deadline:
+                raise RuntimeError("공유 캐시에 추이 데이터 사본이 아직 없습니다")
+            time.sleep(1)
+            if self.refresher.try_acquire():
+                return self._sync()
+        self.synced_at = time.monotonic()
+        self.last_new  = max(n_new, 0)
+        return self.last_new
+
+    def refresh(self, wait=True):
+        """watermark 이후 행만 받아 스냅샷을 교체. 새로 받은 행 수를 반환
+
+        다른 스레드가 이미 갱신 중이면 wait=False 일 때 기다리지 않고 0 을 반환한다.
+        """
+        if not self._lock.acquire(blocking=wait):
+            return 0
+        try:
+            return self._sync()
+        finally:
+            self._lock.release()
+
+    def _refresh_in_background(self):
+        if self._lock.locked():
+            return
+        threading.Thread(target=self.refresh, kwargs={"wait": False}, daemon=True).start()
+
+    def get(self):
+        """현재 스냅샷. TTL 이 지났으면 백그라운드에서 갱신하고 지금 스냅샷을 바로 돌려준다"""
+        if self.df is None:
+            # 첫 로드는 진행 중인 로드(워밍 등)를 기다렸다가 그 결과를 쓴다
+            with self._lock:
+                if self.df is None:
+                    self._sync()
+        elif self.age > (self.ttl if self.is_writer else SHARED_POLL_SECONDS):
+            # 공유 모드의 읽기 전용 프로세스는 메타 파일만 자주 확인한다
+            self._refresh_in_background()
+        return self.df if self.df is not None else pd.DataFrame()
+
+
+class _Entry:
+    __slots__ = ("loader", "value", "loaded_at", "epoch", "used_at", "lock")
+
+    def __init__(self, loader):
+        self.loader    = loader
+        self.value     = _MISSING
+        self.loaded_at = 0.0
+        self.epoch     = -1
+        self.used_at   = time.monotonic()
+        self.lock      = threading.Lock()
+
+
+class SnapshotCache:
+    """키별 스냅샷 + TTL
+
+    - 처음 조회하거나 epoch 가 바뀐 항목은 호출 측에서 받아온다 (같은 키 동시 조회는 한 번만 요청).
+    - TTL 만 지난 항목은 이전 값을 바로 돌려주고 백그라운드에서 갱신한다.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=64):
+        self.ttl         = ttl
+        self.max_entries = max_entries
+        self.epoch       = 0
+        self.hits        = 0   # 신선한 스냅샷 반환
+        self.stale_hits  = 0   # TTL 지난 스냅샷 반환 + 백그라운드 갱신
+        self.misses      = 0   # 첫 조회/epoch 변경으로 호출 측이 기다림
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+
+    def _is_fresh(self, entry):
+        return (
+            entry.value is not _MISSING
+            and entry.epoch == self.epoch
+            and time.monotonic() - entry.loaded_at <= self.ttl
+        )
+
+    def _load(self, entry, force=False):
+        with entry.lock:
+            if not force and self._is_fresh(entry):
+                return entry.value
+            epoch = self.epoch
+            value = entry.loader()
+            entry.value, entry.loaded_at, entry.epoch = value, time.monotonic(), epoch
+            return value
+
+    def _load_in_background(self, entry):
+        if entry.lock.locked():
+            return
+        threading.Thread(target=self._load, args=(entry,), daemon=True).start()
+
+    def get(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(loader)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(key)
+            entry.used_at = time.monotonic()
+
+        if entry.value is _MISSING or entry.epoch != self.epoch:
+            self.misses += 1
+            return self._load(entry)
+        if not self._is_fresh(entry):
+            self.stale_hits += 1
+            self._load_in_background(entry)
+        else:
+            self.hits += 1
+        return entry.value
+
+    def invalidate(self):
+        """모든 항목을 다음 조회 때 다시 받도록 epoch 를 올린다"""
+        with self._lock:
+            self.epoch += 1
+        return self.epoch
+
+    def refresh_due(self, margin, idle=3600):
+        """TTL 만료 margin 초 전인 항목을 미리 갱신. idle 초 넘게 안 쓰인 항목은 버린다"""
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if now - e.used_at > idle]:
+                del self._entries[key]
+            due = [e for e in self._entries.values() if now - e.loaded_at > self.ttl - margin]
+        for entry in due:
+            if not entry.lock.locked():
+                self._load(entry, force=True)
+
+
+class DataRegistry:
+    """비교 데이터 스냅샷과 추이 데이터셋을 함께 보관하는 프로세스 싱글턴"""
+
+    def __init__(self, client, ttl=DEFAULT_TTL, drop_columns=DEFAULT_DROP_COLUMNS, shared=False):
+        self.client     = client
+        self.ttl        = ttl
+        self.history    = HistoryDataset(client, ttl=ttl, drop_columns=drop_columns, shared=shared)
+        self.comparison = SnapshotCache(ttl=ttl)
+        self.pool       = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="data-load")
+
+    def submit(self, job):
+        """job 을 로드 풀에서 실행하는 Future. 예외는 result() 에서 다시 올라온다"""
+        return self.pool.submit(job)
+
+    # ── 비교 데이터 ──
+    def base_rows(self):
+        """v3 전체. 필터 RPC 미배포 환경에서만 쓰이며 epoch/TTL 당 한 번 받아 로컬 필터에 재사용"""
+        return self.comparison.get(("base",), lambda: fetch_base(self.client))
+
+    def facets(self):
+        return self.comparison.get(("facets",), lambda: fetch_facets(self.client, self.base_rows))
+
+    def comparison_rows(self, filter_args):
+        """(필터 적용 DataFrame, 내용 해시 버전)"""
+        def load():
+            df = fetch_comparison(self.client, *filter_args, load_base=self.base_rows)
+            return df, comparison_version(df)
+        return self.comparison.get(("rows", filter_args), load)
+
+    def competitiveness(self):
+        """최근 두 수집일 경쟁력 요약 (최신순)
+
+        스냅샷 테이블이 없거나 비어 있거나, 최신 스냅샷이 마지막 수집일 것이 아니면 None.
+        """
+        def load():
+            summaries = fetch_summaries(self.client)
+            if not summaries:
+                return None
+            return current_summaries(summaries, collection_date(latest_collected_at(self.client)))
+        return self.comparison.get(("competitiveness",), load)
+
+    def heatmaps(self, filter_args, heat_cols, vuln_cols, snapshot_date=None):
+        """서버 집계 (히트맵, 경쟁 상품 수). RPC 미배포 시 각각 None
+
+        snapshot_date 를 주면 (전체 선택 + 최신 스냅샷) 그 날짜의 스냅샷 테이블을 먼저 읽는다.
+        """
+        def load():
+            if snapshot_date is not None:
+                frames = fetch_snapshot_frames(self.client, snapshot_date, heat_cols, vuln_cols)
+                if frames is not None:
+                    return frames
+            return (
+                fetch_rate_diff_heatmap(self.client, heat_cols, *filter_args),
+                fetch_vuln_counts(self.client, vuln_cols, *filter_args),
+            )
+        return self.comparison.get(("heatmap", filter_args, snapshot_date, heat_cols, vuln_cols), load)
+
+    def refresh_comparison(self):
+        forget_missing_rpcs()
+        return self.comparison.invalidate()
+
+    def counters(self):
+        """계측 패널/로그용 캐시 카운터"""
+        return {
+            "comparison_hits":       self.comparison.hits,
+            "comparison_stale_hits": self.comparison.stale_hits,
+            "comparison_misses":     self.comparison.misses,
+            "comparison_epoch":      self.comparison.epoch,
+            "history_syncs":         self.history.syncs,
+            "history_last_new_rows": self.history.last_new,
+            "history_age_s":         round(self.history.age, 1),
+            "history_generation":    self.history.generation,
+            "history_writer":        self.history.is_writer,
+        }
+
+    # ── 백그라운드 갱신 ──
+    def warm(self):
+        """추이 데이터와 첫 화면용 비교 데이터/경쟁력 요약을 동시에 받아 둔다"""
+        jobs = [self.history.get, self.facets, self.competitiveness, lambda: self.comparison_rows(ALL_FILTERS)]
+        return [self.pool.submit(_quietly, job) for job in jobs]
+
+    def refresh_due(self, margin):
+        if self.history.df is None or self.history.age > self.ttl - margin:
+            self.history.refresh(wait=False)
+        self.comparison.refresh_due(margin)
+
+
+def _quietly(job):
+    # 백그라운드 실패는 다음 주기/화면 조회에서 다시 시도되므로 여기서는 삼킨다
+    try:
+        job()
+    except Exception:
+        pass
+
+
+class BackgroundRefresher:
+    """프로세스 시작 시 데이터를 미리 받고, TTL 만료 전에 주기적으로 갱신하는 데몬 스레드"""
+
+    def __init__(self, registry, interval=60, margin=90):
+        self.registry = registry
+        self.interval = interval
+        self.margin   = margin
+        self._stop    = threading.Event()
+        self._thread  = threading.Thread(target=self._run, name="data-refresher", daemon=True)
+
+    def start(self):
+        self.registry.warm()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            _quietly(lambda: self.registry.refresh_due(self.margin))
@@ -0,0 +1,73 @@
+"""필터 선택별 파생 프레임 메모이제이션
+
+(데이터 버전, 필터 선택) 키로 정렬/중복제거/피벗 결과를 프로세스 안에서 공유한다.
+위젯 클릭처럼 필터와 무관한 rerun 은 같은 키를 만나 재계산 없이 캐시를 읽는다.
+LRU 순서로 보관하며 전체 크기가 max_bytes 를 넘으면 오래된 항목부터 버린다.
+반환된 프레임은 여러 세션이 공유하므로 호출 측에서 수정하지 않는다.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_bytes(value):
+    """DataFrame/Series 는 deep memory_usage, dict/tuple/list 는 원소 합"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sum(estimate_bytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class DerivedFrameCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self._items    = OrderedDict()   # key → (value, nbytes)
+        self._bytes    = 0
+        self._lock     = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            self.misses += 1
+
+        # 계산은 락 밖에서 — 동시에 같은 키를 계산하면 나중 결과로 덮어쓴다
+        value  = compute()
+        nbytes = estimate_bytes(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, nbytes)
+            self._bytes += nbytes
+            # 방금 넣은 항목 하나는 예산을 넘어도 남긴다
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._items)
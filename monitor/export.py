@@ -0,0 +1,101 @@
+"""내보내기 파일 생성
+
+요청이 있을 때만 임시 파일에 청크 단위로 써서, 전체 CSV 문자열/바이트를
+메모리에 한꺼번에 만들지 않는다. 전체 이력 내보내기는 finance_data 를
+페이지 단위로 받아 바로 파일에 이어 쓴다.
+"""
+import os
+import tempfile
+from datetime import timedelta
+
+import pandas as pd
+
+from monitor.history_store import HISTORY_FIELDS, iter_history_pages
+
+EXPORT_CHUNK_ROWS = 50_000
+
+_HISTORY_STRING_COLS = ["kor_co_nm", "fin_prdt_nm", "spcl_cnd", "product_type", "rsrv_type_nm"]
+
+
+def frame_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _history_page_frame(rows):
+    """페이지마다 dtype 을 고정 (Parquet 스키마가 페이지 사이에서 달라지지 않게)"""
+    df = pd.DataFrame(rows, columns=HISTORY_FIELDS)
+    df["collected_at"] = pd.to_datetime(df["collected_at"], utc=True)
+    df["save_trm"]     = pd.to_numeric(df["save_trm"], errors="coerce").astype("Int16")
+    for col in ("intr_rate", "intr_rate2"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Float64")
+    for col in _HISTORY_STRING_COLS:
+        df[col] = df[col].astype("string")
+    return df
+
+
+def history_chunks(client, start_date, end_date):
+    """finance_data 의 start_date ~ end_date (양끝 포함) 구간을 페이지 단위 DataFrame 으로"""
+    before = end_date + timedelta(days=1)
+    empty  = True
+    for rows in iter_history_pages(client, since=start_date.isoformat(), before=before.isoformat()):
+        if rows:
+            empty = False
+            yield _history_page_frame(rows)
+    if empty:
+        # 구간에 데이터가 없어도 헤더/스키마는 남긴다
+        yield _history_page_frame([])
+
+
+def write_csv(chunks, path):
+    # utf-8-sig 는 파일 맨 앞에만 BOM 을 쓴다 (엑셀 한글 호환)
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+
+
+def write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer is None:
+            pq.write_table(pa.table({}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# 형식 이름 → (확장자, MIME, 작성 함수)
+EXPORT_FORMATS = {
+    "CSV":     ("csv",     "text/csv",                 write_csv),
+    "Parquet": ("parquet", "application/octet-stream", write_parquet),
+}
+
+
+def export_file(chunks, fmt):
+    """청크를 임시 파일에 쓰고 경로를 반환. 다 쓴 파일은 호출 측에서 remove_export 로 지운다"""
+    ext, _, writer = EXPORT_FORMATS[fmt]
+    fd, path = tempfile.mkstemp(prefix="rate_export_", suffix=f".{ext}")
+    os.close(fd)
+    try:
+        writer(chunks, path)
+    except Exception:
+        remove_export(path)
+        raise
+    return path
+
+
+def remove_export(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
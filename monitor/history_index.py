@@ -0,0 +1,56 @@
+"""추이 데이터 상품별 인덱스
+
+랭킹 탭의 각 expander 가 전체 hist_df 를 다시 훑지 않도록,
+데이터 로드마다 한 번 정규화 컬럼(category)을 벡터 연산으로 만들고
+(은행, 정규화 상품명) → 행 위치 사전을 구성한다 (행 사본은 두지 않고 조회 때 iloc).
+추이 탭의 단일 상품 선택도 (은행, 상품명, 기간) → 행 위치 사전으로 마스크 없이 꺼낸다.
+"""
+from monitor.normalize import clean_product_names, deposit_types
+
+
+# 추이 탭 단일 상품 선택 키
+TREND_KEYS = ["kor_co_nm", "fin_prdt_nm", "save_trm"]
+
+
+def series_positions(frame, keys=TREND_KEYS):
+    """{(은행, 상품명, 기간): 행 위치 배열} — frame.iloc[위치] 로 선택 하나의 행만 꺼낸다"""
+    if frame.empty:
+        return {}
+    return {
+        (bank, prod, int(trm)): pos
+        for (bank, prod, trm), pos in frame.groupby(keys, sort=False, observed=True).indices.items()
+    }
+
+
+def series_options(positions):
+    """선택지 {"banks": [...], "products": {은행: [...]}, "terms": {(은행, 상품명): [...]}}"""
+    products, terms = {}, {}
+    for bank, prod, trm in positions:
+        products.setdefault(bank, set()).add(prod)
+        terms.setdefault((bank, prod), []).append(trm)
+    return {
+        "banks":    sorted(products),
+        "products": {bank: sorted(prods) for bank, prods in products.items()},
+        "terms":    {key: sorted(trms) for key, trms in terms.items()},
+    }
+
+
+def product_history(index, bank, product):
+    """(은행, 정규화 상품명) 의 추이 행 (수집 시각 순). 없으면 None"""
+    positions = index["groups"].get((bank, product))
+    return None if positions is None else index["frame"].iloc[positions]
+
+
+def build_history_index(hist_df):
+    """{"frame": 정규화 컬럼이 붙은 추이 데이터, "groups": {(kor_co_nm, _clean_prod): 행 위치},
+    "series": {(kor_co_nm, fin_prdt_nm, save_trm): 행 위치}, "options": series_options(series)}"""
+    if hist_df.empty:
+        return {"frame": hist_df, "groups": {}, "series": {}, "options": series_options({})}
+
+    frame = hist_df.sort_values("collected_at", kind="stable").reset_index(drop=True)
+    frame["_clean_prod"]   = clean_product_names(frame["fin_prdt_nm"])
+    frame["_deposit_type"] = deposit_types(frame)
+
+    groups = frame.groupby(["kor_co_nm", "_clean_prod"], sort=False, observed=True).indices
+    series = series_positions(frame)
+    return {"frame": frame, "groups": groups, "series": series, "options": series_options(series)}
@@ -0,0 +1,283 @@
+"""finance_data 추이 데이터 로컬 동기화
+
+전체 테이블을 매번 내려받는 대신, 로컬 Parquet 사본을 두고
+마지막 수집 시각(watermark) 이후의 행만 keyset 페이지네이션으로 가져온다.
+메모리/디스크 모두 HISTORY_SCHEMA 의 압축 dtype 으로 보관한다.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+HISTORY_TABLE  = "finance_data"
+HISTORY_FIELDS = [
+    "collected_at", "kor_co_nm", "fin_prdt_nm", "save_trm", "intr_rate", "intr_rate2",
+    "spcl_cnd", "product_type", "rsrv_type_nm",
+]
+HISTORY_COLUMNS = ", ".join(HISTORY_FIELDS)
+
+# 은행/상품명 등은 날짜마다 같은 값이 반복되므로 category, 금리는 float32, 기간(최대 36개월)은 int8
+HISTORY_SCHEMA = {
+    "kor_co_nm":    "category",
+    "fin_prdt_nm":  "category",
+    "spcl_cnd":     "category",
+    "product_type": "category",
+    "rsrv_type_nm": "category",
+    "save_trm":     "int8",
+    "intr_rate":    "float32",
+    "intr_rate2":   "float32",
+}
+
+# 추이 화면에서 쓰지 않아 기본으로 받지 않는 컬럼 (긴 우대조건 문자열)
+DEFAULT_DROP_COLUMNS = ("spcl_cnd",)
+
+# PostgREST(Supabase) 기본 max-rows 와 맞춘 페이지 크기
+PAGE_SIZE = 1000
+
+# 전체 동기화 시 수집 기간을 나눠 동시에 받는 구간 수 (동시 요청 상한)
+FETCH_WORKERS = int(os.environ.get("HISTORY_FETCH_WORKERS", "4"))
+
+CACHE_DIR    = Path(os.environ.get("HISTORY_CACHE_DIR", ".cache"))
+DATA_FILE    = "finance_data.parquet"   # 세대 번호가 없던 이전 형식 사본
+META_FILE    = "finance_data.meta.json"
+
+# 같은 수집 시각 안에서 페이지 순서를 고정하기 위한 정렬 키
+_TIE_ORDER = ["kor_co_nm", "fin_prdt_nm", "save_trm", "rsrv_type_nm"]
+
+
+def history_columns(drop=DEFAULT_DROP_COLUMNS):
+    """select 에 넘길 컬럼 문자열"""
+    return ", ".join(c for c in HISTORY_FIELDS if c not in drop)
+
+
+def apply_history_schema(df):
+    """HISTORY_SCHEMA 에 맞춰 dtype 변환 (없는 컬럼은 건너뜀)"""
+    if df.empty:
+        return df
+    out = {}
+    for col, dtype in HISTORY_SCHEMA.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype == "category":
+            out[col] = df[col].astype("category")
+        elif dtype == "int8":
+            values = pd.to_numeric(df[col], errors="coerce")
+            # 결측이 있으면 nullable 정수로
+            out[col] = values.astype("Int8" if values.isna().any() else "int8")
+        else:
+            out[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+    return df.assign(**out) if out else df
+
+
+def concat_history(local, new):
+    """category 컬럼은 카테고리를 맞춘 뒤 이어 붙인다 (카테고리가 다르면 concat 이 object 로 풀림)"""
+    if local is None or local.empty:
+        return new
+    if new.empty:
+        return local
+    local_cats, new_cats = {}, {}
+    for col in local.columns:
+        if isinstance(local[col].dtype, pd.CategoricalDtype) and col in new.columns:
+            incoming   = new[col].astype("category")
+            categories = local[col].cat.categories.union(incoming.cat.categories)
+            local_cats[col] = local[col].cat.set_categories(categories)
+            new_cats[col]   = incoming.cat.set_categories(categories)
+    return pd.concat([local.assign(**local_cats), new.assign(**new_cats)], ignore_index=True)
+
+
+def _fetch_at(client, collected_at, page_size, columns):
+    """특정 수집 시각의 행 전부 (한 시각에 page_size 이상 쌓일 수 있으므로 range 로 나눠 받음)"""
+    rows, start = [], 0
+    while True:
+        query = client.table(HISTORY_TABLE).select(columns).eq("collected_at", collected_at)
+        for col in _TIE_ORDER:
+            query = query.order(col)
+        page = query.range(start, start + page_size).execute().data
+        if not page:
+            return rows
+        rows.extend(page)
+        start += len(page)
+
+
+def iter_history_pages(client, watermark=None, page_size=PAGE_SIZE, columns=HISTORY_COLUMNS, since=None, before=None):
+    """watermark(수집 시각 원문 문자열) 이후의 행을 collected_at keyset 으로 페이지마다 내보낸다.
+
+    since/before 를 주면 since <= collected_at < before 구간으로 제한한다.
+    서버가 응답을 page_size 보다 작게 잘라도 빈 페이지가 나올 때까지 계속 읽으므로
+    조용히 잘린 이력이 반환되지 않는다.
+    """
+    cursor = watermark
+    while True:
+        query = client.table(HISTORY_TABLE).select(columns).order("collected_at")
+        if cursor is not None:
+            query = query.gt("collected_at", cursor)
+        elif since is not None:
+            query = query.gte("collected_at", since)
+        if before is not None:
+            query = query.lt("collected_at", before)
+        page = query.limit(page_size).execute().data
+        if not page:
+            return
+        # 페이지 경계의 마지막 시각은 일부만 받았을 수 있으므로 그 시각만 따로 전부 받는다
+        last = page[-1]["collected_at"]
+        yield [r for r in page if r["collected_at"] != last] + _fetch_at(client, last, page_size, columns)
+        cursor = last
+
+
+def _edge(client, desc):
+    """가장 이른/늦은 수집 시각 (행이 없으면 None)"""
+    rows = client.table(HISTORY_TABLE).select("collected_at").order("collected_at", desc=desc).limit(1).execute().data
+    return rows[0]["collected_at"] if rows else None
+
+
+def latest_collected_at(client):
+    """서버의 마지막 수집 시각 원문 (행이 없으면 None) — 새 수집분이 있는지 확인하는 가벼운 조회"""
+    return _edge(client, desc=True)
+
+
+def _windows(first, last, n):
+    """[first, last] 를 n 개의 수집 시각 구간 경계로 나눈다 (앞 구간은 [경계, 다음 경계))"""
+    start, end = pd.Timestamp(first), pd.Timestamp(last)
+    if n <= 1 or end <= start:
+        return []
+    return [(start + (end - start) * i / n).isoformat() for i in range(1, n)]
+
+
+def fetch_history_rows(client, watermark=None, page_size=PAGE_SIZE, columns=HISTORY_COLUMNS, workers=1):
+    """watermark 시각부터(포함) 이후의 행 전부 (iter_history_pages 를 한 리스트로)
+
+    watermark 시각 자체도 다시 받는다. 적재가 한 수집 시각을 여러 번에 나눠 쓰는 도중에
+    동기화했다면 그 시각은 일부만 받았을 수 있기 때문이다 (sync_increment 가 로컬 행과 교체).
+
+    workers > 1 이고 watermark 가 없으면(전체 동기화) 수집 기간을 workers 개 구간으로 나눠
+    구간마다 keyset 페이지네이션을 동시에 돌린다. 결과는 구간 순서대로 이어 붙여 시각 순서를 유지한다.
+    """
+    def collect(since=None, before=None, cursor=None):
+        pages = iter_history_pages(client, cursor, page_size, columns, since=since, before=before)
+        return [row for page in pages for row in page]
+
+    if workers <= 1 or watermark is not None:
+        return collect(since=watermark)
+
+    first, last = _edge(client, desc=False), _edge(client, desc=True)
+    bounds = _windows(first, last, workers)
+    if not bounds:
+        return collect()
+    spans = list(zip([None] + bounds, bounds + [None]))
+    with ThreadPoolExecutor(max_workers=len(spans), thread_name_prefix="history-page") as pool:
+        parts = list(pool.map(lambda span: collect(*span), spans))
+    return [row for part in parts for row in part]
+
+
+def read_meta(cache_dir=CACHE_DIR):
+    """로컬 사본 메타 (watermark, rows, columns, generation, data_file). 없거나 손상되었으면 None"""
+    try:
+        return json.loads((Path(cache_dir) / META_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _read_local(cache_dir, columns, meta=None):
+    meta = meta or read_meta(cache_dir)
+    # 다른 컬럼 구성으로 저장된 사본이면 전체 재동기화
+    if meta is None or meta.get("columns") != columns:
+        return None, None
+    try:
+        df = pd.read_parquet(cache_dir / meta.get("data_file", DATA_FILE))
+        return apply_history_schema(df), meta.get("watermark")
+    except Exception:
+        # 손상된 사본은 무시하고 전체 재동기화
+        return None, None
+
+
+def _write_local(cache_dir, df, watermark, columns):
+    """세대 번호가 붙은 새 파일을 쓴 뒤 메타를 교체한다.
+
+    메타 교체가 곧 커밋이라 읽는 쪽(다른 프로세스 포함)은 항상 완성된 한 세대만 본다.
+    직전 세대 파일은 아직 읽고 있는 쪽을 위해 남겨 두고 그 이전 것만 지운다.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    prev       = read_meta(cache_dir) or {}
+    generation = prev.get("generation", 0) + 1
+    data_name  = f"finance_data.{generation}.parquet"
+    data_tmp   = cache_dir / f"{data_name}.tmp"
+    meta_tmp   = cache_dir / f"{META_FILE}.tmp"
+    df.to_parquet(data_tmp, index=False)
+    os.replace(data_tmp, cache_dir / data_name)
+    meta_tmp.write_text(json.dumps({
+        "watermark": watermark, "rows": len(df), "columns": columns,
+        "generation": generation, "data_file": data_name,
+    }), encoding="utf-8")
+    os.replace(meta_tmp, cache_dir / META_FILE)
+
+    keep = {data_name, prev.get("data_file")}
+    for path in cache_dir.glob("finance_data*.parquet"):
+        if path.name not in keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _to_frame(rows):
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["collected_at"] = pd.to_datetime(df["collected_at"])
+    return apply_history_schema(df)
+
+
+def sync_increment(client, local, watermark, cache_dir=CACHE_DIR, columns=HISTORY_COLUMNS, workers=FETCH_WORKERS):
+    """메모리의 추이 데이터(local)에 watermark 이후 행만 붙인다.
+
+    watermark 시각의 행은 다시 받아 로컬 행과 교체하므로, 일부만 적재된 시각에 동기화했더라도
+    다음 동기화에서 채워진다. (갱신된 DataFrame, 새 watermark, 새로 받은 행 수) 를 반환하며
+    행 수가 달라졌을 때만 로컬 사본을 다시 쓴다.
+    """
+    rows  = fetch_history_rows(client, watermark, columns=columns, workers=workers)
+    n_new = len(rows)
+    if local is not None and watermark is not None:
+        at_mark = (local["collected_at"] == pd.Timestamp(watermark)).to_numpy()
+        n_new  -= int(at_mark.sum())
+        if not rows or n_new == 0:
+            return local, watermark, 0
+        local = local[~at_mark]
+    elif local is not None and not rows:
+        return local, watermark, 0
+
+    new_df = _to_frame(rows)
+    if rows:
+        watermark = max(r["collected_at"] for r in rows)
+    df = concat_history(local, new_df)
+
+    try:
+        _write_local(Path(cache_dir), df, watermark, columns)
+    except OSError:
+        # 읽기 전용 배포 환경에서는 로컬 사본 없이 동작
+        pass
+    return df, watermark, max(n_new, 0)
+
+
+def load_local(cache_dir=CACHE_DIR, columns=HISTORY_COLUMNS, meta=None):
+    """로컬 사본 (DataFrame, watermark). 없거나 손상되었으면 (None, None)
+
+    meta 를 넘기면 그 메타가 가리키는 세대를 읽는다 (메타를 먼저 읽은 쪽이 같은 세대를 받도록).
+    """
+    return _read_local(Path(cache_dir), columns, meta)
+
+
+def sync_history(client, cache_dir=CACHE_DIR, full=False, columns=HISTORY_COLUMNS, workers=FETCH_WORKERS):
+    """로컬 사본을 갱신하고 전체 추이 DataFrame 을 반환한다.
+
+    full=True 이면 로컬 사본을 버리고 처음부터 다시 받는다.
+    """
+    local, watermark = (None, None) if full else load_local(cache_dir, columns)
+    return sync_increment(client, local, watermark, cache_dir, columns, workers)[0]
+
+
+def history_version(df):
+    """캐시 키로 쓰는 가벼운 데이터 버전 토큰 (행 수, 마지막 수집 시각)"""
+    if df.empty:
+        return (0, None)
+    return (len(df), str(df["collected_at"].max()))
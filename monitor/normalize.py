@@ -0,0 +1,92 @@
+"""상품명 정규화와 적립 방식 분류
+
+상품명은 날짜·기간마다 같은 값이 반복되므로 고유값만 Series.str 벡터 연산으로 처리하고
+결과를 모듈 캐시에 남겨 다음 호출(다른 프레임, 다음 데이터 버전)에서는 처음 보는 이름만 처리한다.
+
+지원하는 표기: (자유적립식) [정액적립식] （자유 적립식） 【정액적립】 <자유적립식>, 끝에 붙은 "- 자유적립식",
+괄호 안팎 공백, 전각 공백/NBSP, 연속 공백.
+"""
+import numpy as np
+import pandas as pd
+
+_KIND  = r"(?:자유|정액)\s*적립식?"
+_OPEN  = r"[\(\[（【<〈［]"
+_CLOSE = r"[\)\]）】>〉］]"
+
+# 상품명 안의 적립 방식 표기 (괄호형 / 끝에 붙은 구분자형). \s 는 전각 공백·NBSP 도 포함
+DEPOSIT_SUFFIX_PATTERN = rf"\s*{_OPEN}\s*{_KIND}\s*{_CLOSE}|\s*[-–/·]\s*{_KIND}\s*$"
+
+# 원문 → 결과 캐시. 고유 이름 수가 적어 상한에 닿으면 비우고 다시 채운다
+_CACHE_LIMIT = 100_000
+_clean_cache     = {}
+_name_kind_cache = {}
+_rsrv_kind_cache = {}
+
+
+def _strip_vectorized(values):
+    stripped = values.str.replace(DEPOSIT_SUFFIX_PATTERN, "", regex=True)
+    return stripped.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def _contains(values, text):
+    # string dtype 의 str.contains 는 BooleanArray — pandas < 2.2 의 np.select 는 bool ndarray 만 받는다
+    return values.str.contains(text, regex=False).to_numpy(dtype=bool, na_value=False)
+
+
+def _kind_vectorized(values):
+    """"자유" / "정액" / "" """
+    return pd.Series(
+        np.select([_contains(values, "자유"), _contains(values, "정액")], ["자유", "정액"], default=""),
+        index=values.index,
+    )
+
+
+def _name_kind_vectorized(values):
+    # 상품명은 적립 방식 표기가 있을 때만 분류 (이름에 '자유' 가 들어간 일반 상품 제외)
+    return _kind_vectorized(values.str.extract(f"({_KIND})", expand=False).fillna(""))
+
+
+def _map_unique(names, cache, vectorized):
+    """고유값 중 캐시에 없는 것만 vectorized 로 처리하고 원래 위치로 펼친다 (category). 결측은 "" """
+    codes, uniques = pd.factorize(names)
+    uniques = [str(u) for u in uniques]
+    missing = [u for u in uniques if u not in cache]
+    if missing:
+        if len(cache) + len(missing) > _CACHE_LIMIT:
+            cache.clear()
+        cache.update(zip(missing, vectorized(pd.Series(missing, dtype="string")).tolist()))
+    # 행마다 문자열을 두지 않고 고유 결과의 코드만 펼친다. factorize 의 결측 코드 -1 은 마지막 "" 를 가리킨다
+    mapped = pd.Categorical([cache[u] for u in uniques] + [""])
+    return pd.Series(pd.Categorical.from_codes(mapped.codes[codes], mapped.categories), index=names.index)
+
+
+def clean_product_names(names):
+    """상품명 Series 에서 적립 방식 표기를 지우고 공백을 정리한다 (category)"""
+    return _map_unique(names, _clean_cache, _strip_vectorized)
+
+
+def strip_deposit_type(name):
+    """상품명 하나 (화면 헤더용)"""
+    if not isinstance(name, str):
+        return ""
+    if name not in _clean_cache:
+        _clean_cache[name] = _strip_vectorized(pd.Series([name], dtype="string")).iloc[0]
+    return _clean_cache[name]
+
+
+DEPOSIT_TYPES = ["자유", "정액", "일반"]
+
+
+def _type_codes(kinds):
+    """"자유"/"정액"/"" category → DEPOSIT_TYPES 코드 배열 ("" 는 "일반")"""
+    lookup = np.array([DEPOSIT_TYPES.index(c) if c else 2 for c in kinds.cat.categories], dtype="int8")
+    return lookup[kinds.cat.codes.to_numpy()]
+
+
+def deposit_types(df):
+    """적립 방식 Series ("자유" / "정액" / "일반", category) — 1순위 rsrv_type_nm 컬럼, 2순위 상품명 표기"""
+    codes = _type_codes(_map_unique(df["fin_prdt_nm"], _name_kind_cache, _name_kind_vectorized))
+    if "rsrv_type_nm" in df.columns:
+        by_rsrv = _type_codes(_map_unique(df["rsrv_type_nm"], _rsrv_kind_cache, _kind_vectorized))
+        codes = np.where(by_rsrv != 2, by_rsrv, codes)
+    return pd.Series(pd.Categorical.from_codes(codes, DEPOSIT_TYPES), index=df.index)
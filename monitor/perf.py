@@ -0,0 +1,64 @@
+"""rerun 단위 성능 계측
+
+데이터 로드, 파생 프레임 계산, 탭 렌더링, 그래프 생성 구간을 span 으로 재고
+rerun 이 끝나면 한 줄짜리 JSON 레코드로 남긴다 (logging + 선택적으로 JSON-lines 파일).
+fragment 는 전체 rerun 과 따로 실행되므로 자기 타이머를 만들어 따로 기록한다.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger("monitor.perf")
+
+# 지정하면 rerun 마다 JSON 한 줄씩 이어 쓴다
+PERF_LOG_PATH = os.environ.get("PERF_LOG_PATH")
+
+
+class RerunTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans   = []   # [(이름, ms)] — 같은 이름이 여러 번 나올 수 있음 (상품별 그래프 등)
+
+    @contextmanager
+    def span(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, (time.perf_counter() - t0) * 1000))
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self):
+        """이름별 (호출 수, 합계 ms), 첫 등장 순서 유지"""
+        agg = {}
+        for name, ms in self.spans:
+            count, total = agg.get(name, (0, 0.0))
+            agg[name] = (count + 1, total + ms)
+        return agg
+
+    def record(self, counters=None, scope="rerun"):
+        """scope: 전체 rerun 이면 "rerun", fragment 부분 재실행이면 fragment 이름"""
+        return {
+            "ts":       datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "scope":    scope,
+            "total_ms": round(self.elapsed_ms, 2),
+            "spans":    [{"name": name, "ms": round(ms, 2)} for name, ms in self.spans],
+            "counters": counters or {},
+        }
+
+
+def emit(record, path=PERF_LOG_PATH):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    logger.info(line)
+    if path:
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            logger.warning("perf log write failed: %s", path)
@@ -0,0 +1,73 @@
+"""금리 변동 감지 엔진
+
+추이 데이터 전체를 시리즈(은행 × 상품 × 기간 × 적립방식) 단위로 정렬한 뒤
+groupby + shift 한 번으로 직전 수집값과 비교해 변동 이벤트 테이블을 만든다.
+"""
+import numpy as np
+import pandas as pd
+
+SERIES_KEYS = ["kor_co_nm", "fin_prdt_nm", "save_trm", "rsrv_type_nm"]
+RATE_COLS   = ["intr_rate", "intr_rate2"]
+
+
+def detect_rate_changes(hist_df, keys=SERIES_KEYS):
+    """변동 이벤트 테이블
+
+    컬럼: keys + prev_collected_at, collected_at, prev_intr_rate, intr_rate, prev_intr_rate2, intr_rate2
+    keys 가 비어 있으면 hist_df 전체를 하나의 시리즈로 본다.
+    """
+    keys = [k for k in keys if k in hist_df.columns]
+    event_cols = keys + ["prev_collected_at", "collected_at", "prev_intr_rate", "intr_rate", "prev_intr_rate2", "intr_rate2"]
+    if hist_df.empty:
+        return pd.DataFrame(columns=event_cols)
+
+    df = hist_df[keys + ["collected_at"] + RATE_COLS].sort_values(keys + ["collected_at"], kind="stable").reset_index(drop=True)
+    value_cols = ["collected_at"] + RATE_COLS
+    if keys:
+        prev = df.groupby(keys, sort=False, dropna=False, observed=True)[value_cols].shift()
+    else:
+        prev = df[value_cols].shift()
+
+    # 시리즈 첫 행은 비교 대상이 없으므로 제외 (기존 diff().ne(0) 과 같이 NaN 끼리는 변동으로 본다)
+    changed = prev["collected_at"].notna() & (
+        df["intr_rate"].ne(prev["intr_rate"]) | df["intr_rate2"].ne(prev["intr_rate2"])
+    )
+    events = df[changed].copy()
+    events["prev_collected_at"] = prev.loc[changed, "collected_at"]
+    events["prev_intr_rate"]    = prev.loc[changed, "intr_rate"]
+    events["prev_intr_rate2"]   = prev.loc[changed, "intr_rate2"]
+    return events[event_cols].reset_index(drop=True)
+
+
+def recent_changes(events, latest, days=7):
+    """마지막 수집 시각(latest) 기준 최근 days 일 안의 변동, 최신순
+
+    latest 는 추이 데이터 전체의 마지막 수집 시각이다 (마지막 변동 시각이 아님).
+    """
+    if events.empty:
+        return events
+    since = latest - pd.Timedelta(days=days)
+    return events[events["collected_at"] >= since].sort_values("collected_at", ascending=False, kind="stable")
+
+
+def _pct(values):
+    return values.map("{:.2f}%".format)
+
+
+def _signed_pp(values):
+    return pd.Series(np.where(values >= 0, "+", ""), index=values.index) + values.map("{:.2f}%p".format)
+
+
+def format_change_table(events):
+    """변동 이력 화면용 테이블 (이전 수치 → 현재 수치)"""
+    table = pd.DataFrame({
+        "기준일 (이전)":    events["prev_collected_at"].dt.strftime("%Y-%m-%d"),
+        "변동일 (현재)":    events["collected_at"].dt.strftime("%Y-%m-%d"),
+        "기본금리 이전(%)": _pct(events["prev_intr_rate"]),
+        "기본금리 현재(%)": _pct(events["intr_rate"]),
+        "기본금리 변동":    _signed_pp(events["intr_rate"] - events["prev_intr_rate"]),
+        "최대금리 이전(%)": _pct(events["prev_intr_rate2"]),
+        "최대금리 현재(%)": _pct(events["intr_rate2"]),
+        "최대금리 변동":    _signed_pp(events["intr_rate2"] - events["prev_intr_rate2"]),
+    })
+    return table.reset_index(drop=True)
@@ -0,0 +1,53 @@
+"""수집 시각 × 시리즈(은행, 상품, 기간, 적립방식) 금리 큐브
+
+데이터 버전마다 한 번 넓은 배열로 펼쳐 두면 여러 상품/기간을 겹쳐 보는 선택은
+전체 추이를 다시 훑지 않고 열 몇 개를 꺼내는 것으로 끝난다.
+"""
+import numpy as np
+import pandas as pd
+
+from monitor.rate_changes import SERIES_KEYS
+
+WOORI_BANK = "우리은행"
+
+
+def build_rate_cube(hist_df, value="intr_rate2"):
+    """index=collected_at, columns=MultiIndex(SERIES_KEYS) 인 float32 넓은 DataFrame
+
+    rsrv_type_nm 결측은 "" 로 둔다. 같은 칸에 여러 행이 있으면 마지막 행 값.
+    """
+    if hist_df.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="collected_at"),
+                            columns=pd.MultiIndex.from_tuples([], names=SERIES_KEYS), dtype="float32")
+
+    keys = hist_df[SERIES_KEYS].assign(rsrv_type_nm=hist_df["rsrv_type_nm"].astype("string").fillna(""))
+    grouped = keys.groupby(SERIES_KEYS, sort=True, observed=True)
+    col_codes = grouped.ngroup().to_numpy()
+    columns   = pd.MultiIndex.from_tuples(list(grouped.groups), names=SERIES_KEYS)
+    row_codes, dates = pd.factorize(hist_df["collected_at"], sort=True)
+
+    values = np.full((len(dates), len(columns)), np.nan, dtype="float32")
+    order  = np.argsort(row_codes, kind="stable")   # 같은 칸은 나중 행이 덮어씀
+    values[row_codes[order], col_codes[order]] = hist_df[value].to_numpy(dtype="float32")[order]
+    return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name="collected_at"), columns=columns)
+
+
+def cube_products(cube):
+    """(은행, 상품명) 목록 — 선택지용"""
+    return cube.columns.droplevel(["save_trm", "rsrv_type_nm"]).unique().tolist()
+
+
+def select_series(cube, products, terms):
+    """(은행, 상품명) × 기간 에 해당하는 열만 (적립방식별 열은 모두 포함)"""
+    cols = cube.columns
+    mask = cols.droplevel(["save_trm", "rsrv_type_nm"]).isin(list(products)) & cols.get_level_values("save_trm").isin(list(terms))
+    return cube.loc[:, mask]
+
+
+def matching_woori(fdf, col, products, terms):
+    """비교 데이터에서 선택한 타행 상품·기간과 짝지어진 우리은행 상품명 목록"""
+    if fdf.empty or not products:
+        return []
+    pairs = pd.MultiIndex.from_frame(fdf[[col["bank"], col["bank_prod"]]])
+    hit   = pairs.isin(list(products)) & fdf[col["period"]].isin(list(terms)).to_numpy()
+    return sorted(fdf.loc[hit, col["woori_prod"]].dropna().unique().tolist())
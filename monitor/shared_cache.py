@@ -0,0 +1,58 @@
+"""같은 호스트의 여러 앱 프로세스가 추이 데이터 사본 하나를 나눠 쓰기 위한 갱신 담당자 잠금
+
+캐시 디렉터리의 잠금 파일을 먼저 잡은 프로세스 하나만 Supabase 에서 동기화해 사본을 쓰고,
+나머지는 메타 파일의 세대 번호가 바뀌면 새 세대 파일을 읽기만 한다.
+담당 프로세스가 종료되면 잠금이 풀리므로 다음 갱신 때 다른 프로세스가 이어받는다.
+공유되는 것은 Supabase 동기화와 디스크 사본뿐이다. 각 프로세스는 사본을 읽어 자기 DataFrame 을
+따로 만들므로 프로세스당 메모리 사용량은 줄지 않는다.
+fcntl 이 없는 플랫폼(Windows)에서는 항상 담당자로 동작한다 (프로세스별 동기화).
+"""
+import os
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+
+LOCK_FILE = "refresher.lock"
+
+# 공유 모드에서 읽기 전용 프로세스가 새 세대를 확인하는 간격 (초)
+SHARED_POLL_SECONDS = int(os.environ.get("SHARED_CACHE_POLL", "10"))
+
+
+class RefresherLock:
+    def __init__(self, cache_dir):
+        self.path   = Path(cache_dir) / LOCK_FILE
+        self._file  = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        """잠금을 (이미 잡았거나 새로 잡았으면) True. 다른 프로세스가 잡고 있으면 False"""
+        if self._file is not None or fcntl is None:
+            return True
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            f = open(self.path, "a+")
+        except OSError:
+            # 잠금 파일을 만들 수 없으면 공유 없이 스스로 동기화
+            return True
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()   # close 와 함께 flock 해제
+            self._file = None
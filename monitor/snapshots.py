@@ -0,0 +1,110 @@
+"""수집일별 경쟁력 요약 스냅샷 (sql/competitiveness_snapshots.sql)
+
+적재 후 materialize_competitiveness() 로 저장된 요약/히트맵/취약 상품 집계를 읽는다.
+저장은 수집 직후 실행하는 알림 작업(monitor.alerts)이 materialize() 로 호출한다.
+전체 선택(필터 없음) 화면은 비교 행을 다시 집계하지 않고 이 작은 테이블만 조회하며,
+직전 수집일 요약과 비교해 전일 대비 변화를 보여준다.
+테이블이 아직 없는 환경에서는 None 을 반환해 호출 측이 기존 집계로 대체한다.
+최신 스냅샷 날짜가 finance_data 의 마지막 수집일과 다르면 (적재 후 materialize 전) 쓰지 않는다.
+"""
+import pandas as pd
+from postgrest.exceptions import APIError
+
+SUMMARY_TABLE   = "competitiveness_daily"
+HEATMAP_TABLE   = "competitiveness_heatmap_daily"
+VULN_TABLE      = "competitiveness_vuln_daily"
+MATERIALIZE_RPC = "materialize_competitiveness"
+
+# 스냅샷 날짜 기준 (materialize_competitiveness 와 같은 KST 날짜)
+LOCAL_TZ = "Asia/Seoul"
+
+SUMMARY_FIELDS = ["snapshot_date", "compared_rows", "max_diff", "high_risk", "banks", "top_bank", "top_prdt_nm"]
+
+# 테이블/함수 미생성 시 PostgREST 오류 코드 (버전에 따라 다름)
+_MISSING_TABLE_CODES    = {"PGRST205", "42P01"}
+_MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+
+def _select_or_none(query):
+    try:
+        return query.execute().data
+    except APIError as e:
+        if e.code in _MISSING_TABLE_CODES:
+            return None
+        raise
+
+
+def materialize(client, snapshot_date=None, threshold=None):
+    """적재 직후 호출. 저장된 스냅샷 날짜(문자열)를 반환, SQL 미배포 시 None"""
+    params = {}
+    if snapshot_date is not None:
+        params["p_date"] = str(snapshot_date)
+    if threshold is not None:
+        params["p_threshold"] = threshold
+    try:
+        return client.rpc(MATERIALIZE_RPC, params).execute().data
+    except APIError as e:
+        if e.code in _MISSING_FUNCTION_CODES:
+            return None
+        raise
+
+
+def fetch_summaries(client, days=2):
+    """최근 days 개 수집일 요약 (최신순 dict 리스트). 테이블이 없으면 None"""
+    return _select_or_none(
+        client.table(SUMMARY_TABLE).select(", ".join(SUMMARY_FIELDS))
+        .order("snapshot_date", desc=True).limit(days)
+    )
+
+
+def collection_date(collected_at):
+    """수집 시각 원문 → 스냅샷 날짜 문자열 (YYYY-MM-DD, KST). None 이면 None"""
+    if collected_at is None:
+        return None
+    ts = pd.Timestamp(collected_at)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(LOCAL_TZ)
+    return ts.date().isoformat()
+
+
+def current_summaries(summaries, latest_date):
+    """최신 요약이 마지막 수집일 것일 때만 summaries, 아니면 None (호출 측이 비교 행으로 집계)"""
+    if not summaries or latest_date is None:
+        return None
+    return summaries if str(summaries[0]["snapshot_date"])[:10] == latest_date else None
+
+
+def fetch_snapshot_frames(client, snapshot_date, heat_cols, vuln_cols):
+    """(히트맵, 경쟁 상품 수) — fetch_rate_diff_heatmap / fetch_vuln_counts 와 같은 컬럼 구성"""
+    heat = _select_or_none(
+        client.table(HEATMAP_TABLE).select("kor_co_nm, save_trm, rate_diff").eq("snapshot_date", snapshot_date)
+    )
+    vuln = _select_or_none(
+        client.table(VULN_TABLE).select("woori_prdt_nm, save_trm, cnt").eq("snapshot_date", snapshot_date)
+    )
+    if heat is None or vuln is None:
+        return None
+    return (
+        pd.DataFrame(heat, columns=["kor_co_nm", "save_trm", "rate_diff"]).set_axis(list(heat_cols), axis=1),
+        pd.DataFrame(vuln, columns=["woori_prdt_nm", "save_trm", "cnt"]).set_axis(list(vuln_cols), axis=1),
+    )
+
+
+def summary_stats(summary):
+    """요약 행을 transforms.headline_stats 와 같은 키로"""
+    return {
+        "rows":      int(summary["compared_rows"]),
+        "max_diff":  float(summary["max_diff"]),
+        "high_risk": int(summary["high_risk"]),
+        "banks":     int(summary["banks"]),
+        "top_bank":  summary.get("top_bank"),
+        "top_prod":  summary.get("top_prdt_nm"),
+    }
+
+
+def summary_deltas(latest, previous):
+    """전일(직전 수집일) 대비 변화량. 직전 요약이 없으면 None"""
+    if previous is None:
+        return None
+    cur, prev = summary_stats(latest), summary_stats(previous)
+    return {key: round(cur[key] - prev[key], 4) for key in ("rows", "max_diff", "high_risk", "banks")}
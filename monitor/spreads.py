@@ -0,0 +1,132 @@
+"""우리은행 대비 금리차(spread) 시계열 엔진
+
+타행 시리즈(은행 × 상품 × 기간 × 적립방식)를 일 단위로 펼치고, 같은 날짜·상품타입·기간의
+우리은행 최고 최대금리와 as-of merge 로 맞붙인다. 수집이 빠진 날은 양쪽 모두 직전 값을 이어 쓴다.
+전체 추이를 한 번에 계산하므로 데이터 버전마다 한 번만 돌리면 된다.
+"""
+import numpy as np
+import pandas as pd
+
+from monitor.rate_changes import SERIES_KEYS
+from monitor.rate_cube import WOORI_BANK
+
+BENCH_KEYS   = ["product_type", "save_trm"]
+SPREAD_COLS  = SERIES_KEYS + ["product_type", "day", "intr_rate2", "woori_rate", "rate_diff"]
+STREAK_COLS  = SERIES_KEYS + ["days", "days_ahead", "current_streak", "ahead_since", "longest_streak", "last_diff", "max_diff"]
+
+# 수집 시각(UTC)을 국내 영업일 기준 날짜로
+LOCAL_TZ = "Asia/Seoul"
+
+
+def _to_day(collected_at):
+    if collected_at.dt.tz is not None:
+        collected_at = collected_at.dt.tz_convert(LOCAL_TZ).dt.tz_localize(None)
+    return collected_at.dt.normalize()
+
+
+def _daily(hist_df):
+    """(시리즈, 날짜) 마다 그날 마지막 수집값 한 행"""
+    frame = hist_df[SERIES_KEYS + ["product_type", "collected_at", "intr_rate2"]].assign(
+        rsrv_type_nm=hist_df["rsrv_type_nm"].astype("string").fillna(""),
+        day=_to_day(hist_df["collected_at"]),
+    )
+    frame = frame.sort_values("collected_at", kind="stable").drop_duplicates(SERIES_KEYS + ["day"], keep="last")
+    frame["bench_id"] = frame.groupby(BENCH_KEYS, observed=True).ngroup()
+    return frame
+
+
+def _day_grid(series):
+    """시리즈마다 첫 수집일 ~ 마지막 수집일의 모든 날짜 (sid, day), day 오름차순"""
+    counts  = ((series["last"] - series["first"]).dt.days + 1).to_numpy()
+    starts  = np.repeat(series["first"].to_numpy(), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    grid = pd.DataFrame({
+        "sid": np.repeat(series.index.to_numpy(), counts),
+        "day": starts + offsets.astype("timedelta64[D]"),
+    })
+    return grid.sort_values("day", kind="stable")
+
+
+def build_spreads(hist_df, woori_bank=WOORI_BANK):
+    """타행 시리즈별 일별 금리차 테이블 (SPREAD_COLS)
+
+    woori_rate 는 같은 상품타입·기간 우리은행 상품 중 최고 최대금리,
+    rate_diff = 타행 최대금리 - woori_rate (소수 둘째 자리, 우리은행 값이 아직 없으면 NaN).
+    """
+    if hist_df.empty:
+        return pd.DataFrame(columns=SPREAD_COLS)
+
+    daily    = _daily(hist_df)
+    is_woori = (daily["kor_co_nm"] == woori_bank).to_numpy()
+    woori = (
+        daily[is_woori].groupby(["day", "bench_id"])["intr_rate2"].max()
+        .rename("woori_rate").reset_index().sort_values("day", kind="stable")
+    )
+    comp = daily[~is_woori].copy()
+    comp["sid"] = comp.groupby(SERIES_KEYS, observed=True).ngroup()
+
+    series = comp.groupby("sid").agg(
+        **{k: (k, "first") for k in SERIES_KEYS + ["product_type", "bench_id"]},
+        first=("day", "min"), last=("day", "max"),
+    )
+    spreads = pd.merge_asof(_day_grid(series), comp[["day", "sid", "intr_rate2"]].sort_values("day", kind="stable"),
+                            on="day", by="sid", direction="backward")
+    spreads["bench_id"] = series["bench_id"].to_numpy()[spreads["sid"].to_numpy()]
+    spreads = pd.merge_asof(spreads, woori, on="day", by="bench_id", direction="backward")
+
+    # float32 금리끼리 뺀 오차(0.0999...)가 남지 않도록 float64 로 계산 후 반올림
+    spreads["rate_diff"] = (spreads["intr_rate2"].astype("float64") - spreads["woori_rate"].astype("float64")).round(2)
+    spreads = spreads.sort_values(["sid", "day"], kind="stable").reset_index(drop=True)
+    keys = series[SERIES_KEYS + ["product_type"]].iloc[spreads["sid"].to_numpy()].reset_index(drop=True)
+    return pd.concat([keys, spreads[["day", "intr_rate2", "woori_rate", "rate_diff"]]], axis=1)[SPREAD_COLS]
+
+
+def spread_streaks(spreads):
+    """시리즈별 우위 통계 (STREAK_COLS)
+
+    days_ahead: 금리차 > 0 인 날 수, current_streak: 마지막 날까지 이어진 연속 우위 일수(ahead_since 부터),
+    longest_streak: 가장 긴 연속 우위 일수.
+    마지막 수집일(전체 추이 기준)에 수집되지 않은 시리즈(판매 중단 등)는 current_streak 0.
+    """
+    if spreads.empty:
+        return pd.DataFrame(columns=STREAK_COLS)
+
+    sid   = spreads.groupby(SERIES_KEYS, sort=False, observed=True).ngroup().to_numpy()
+    ahead = (spreads["rate_diff"] > 0).to_numpy()
+    # 시리즈가 바뀌거나 우위 여부가 바뀌면 새 구간
+    new_run = np.ones(len(spreads), dtype=bool)
+    new_run[1:] = (sid[1:] != sid[:-1]) | (ahead[1:] != ahead[:-1])
+    run = np.cumsum(new_run)
+
+    frame = pd.DataFrame({"sid": sid, "run": run, "ahead": ahead, "day": spreads["day"].to_numpy(), "rate_diff": spreads["rate_diff"].to_numpy()})
+    runs  = frame.groupby("run").agg(sid=("sid", "first"), ahead=("ahead", "first"), start=("day", "min"), length=("day", "size"))
+    ahead_runs = runs[runs["ahead"]]
+    last = frame.groupby("sid").tail(1).set_index("sid")
+    last_run = runs.loc[last["run"].to_numpy()].set_index("sid")
+    current  = last_run["ahead"] & (last["day"] == frame["day"].max())
+
+    stats = spreads.groupby(sid)[SERIES_KEYS].first()
+    grouped = frame.groupby("sid")
+    stats["days"]           = grouped.size()
+    stats["days_ahead"]     = grouped["ahead"].sum()
+    stats["current_streak"] = last_run["length"].where(current, 0)
+    stats["ahead_since"]    = last_run["start"].where(current)
+    stats["longest_streak"] = ahead_runs.groupby("sid")["length"].max().reindex(stats.index, fill_value=0)
+    stats["last_diff"]      = last["rate_diff"]
+    stats["max_diff"]       = grouped["rate_diff"].max()
+    return stats.reset_index(drop=True)[STREAK_COLS]
+
+
+def format_streak_table(streaks):
+    """연속 우위 화면용 테이블"""
+    return pd.DataFrame({
+        "은행":          streaks["kor_co_nm"].to_numpy(),
+        "상품명":        streaks["fin_prdt_nm"].to_numpy(),
+        "저축기간(월)":  streaks["save_trm"].to_numpy(),
+        "적립방식":      streaks["rsrv_type_nm"].replace("", "-").to_numpy(),
+        "연속 우위(일)": streaks["current_streak"].to_numpy(),
+        "우위 시작일":   streaks["ahead_since"].dt.strftime("%Y-%m-%d").fillna("-").to_numpy(),
+        "누적 우위(일)": streaks["days_ahead"].to_numpy(),
+        "최장 연속(일)": streaks["longest_streak"].to_numpy(),
+        "현재 금리차":   streaks["last_diff"].map("{:+.2f}%p".format).to_numpy(),
+    })
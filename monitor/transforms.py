@@ -0,0 +1,116 @@
+"""비교 데이터 변환 (Streamlit 비의존)
+
+화면과 벤치마크, 배치 작업이 같은 계산을 쓰도록 필터/중복제거/피벗/요약 지표를
+순수 함수로 둔다. 비교 데이터 컬럼은 get_new_better_products_v3 반환 순서(위치)로 해석한다.
+"""
+import pandas as pd
+
+from monitor.normalize import clean_product_names
+
+PERIOD_ORDER = [1, 3, 6, 12, 24, 36]
+
+# 고위험 상품 기준 금리차 (%p)
+HIGH_RISK_THRESHOLD = 0.3
+
+COL_KEYS = [
+    "type", "woori_prod", "period", "bank", "bank_prod",
+    "woori_base", "woori_max", "bank_base", "bank_max", "rate_diff", "benefit",
+]
+DISPLAY_LABELS = [
+    "상품타입", "우리은행상품", "저축기간(월)", "타행명", "타행상품명",
+    "우리 기본금리", "우리 최대금리", "타행 기본금리", "타행 최대금리",
+    "금리차(%p)", "우대조건",
+]
+VULN_COUNT_COL = "경쟁 상품 수"
+
+
+def comparison_columns(df):
+    """의미 키 → 실제 컬럼명"""
+    return {key: df.columns[i] for i, key in enumerate(COL_KEYS)}
+
+
+def filter_comparison(df, types=None, periods=None, banks=None):
+    """상품 타입/저축 기간/타행 필터 (None 인 필터는 전체)"""
+    if df.empty:
+        return df
+    col  = comparison_columns(df)
+    mask = pd.Series(True, index=df.index)
+    for key, values in (("type", types), ("period", periods), ("bank", banks)):
+        if values is not None:
+            mask &= df[col[key]].isin(values)
+    return df[mask].reset_index(drop=True)
+
+
+def rate_diff_heatmap(df):
+    """타행 × 저축기간 최대 금리차 (long 형식)"""
+    col = comparison_columns(df)
+    return df.groupby([col["bank"], col["period"]])[col["rate_diff"]].max().reset_index()
+
+
+def vuln_counts(df):
+    """우리은행 상품 × 저축기간 경쟁 상품 수 (long 형식)"""
+    col = comparison_columns(df)
+    return df.groupby([col["woori_prod"], col["period"]]).size().reset_index(name=VULN_COUNT_COL)
+
+
+def _period_pivot(long_df, index, value):
+    table = long_df.pivot(index=index, columns=long_df.columns[1], values=value).fillna(0)
+    # 저축 기간 순서 정렬
+    return table.reindex(columns=[p for p in PERIOD_ORDER if p in table.columns])
+
+
+def dedup_products(df):
+    """상품명 기준 중복 제거: 괄호 제거 후 금리차 가장 높은 기간 대표값으로"""
+    col = comparison_columns(df)
+    out = df.copy()
+    out["_clean_prod"] = clean_product_names(out[col["bank_prod"]])
+    return (
+        out.sort_values(col["rate_diff"], ascending=False)
+        .drop_duplicates(subset=[col["bank"], "_clean_prod"], keep="first")
+        .reset_index(drop=True)
+    )
+
+
+def display_frame(df):
+    """전체 데이터 탭용: 한글 컬럼명, 금리차 내림차순"""
+    rename_map = dict(zip(df.columns[:len(DISPLAY_LABELS)], DISPLAY_LABELS))
+    return (
+        df[list(rename_map)].rename(columns=rename_map)
+        .sort_values("금리차(%p)", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def derive_frames(fdf, pivot=None, vuln=None):
+    """화면에서 쓰는 파생 프레임 묶음. pivot/vuln 에 서버 집계를 넘기면 그대로 사용"""
+    col = comparison_columns(fdf)
+    if pivot is None:
+        pivot = rate_diff_heatmap(fdf)
+    if vuln is None:
+        vuln = vuln_counts(fdf)
+    return {
+        "dedup_df":    dedup_products(fdf),
+        "pivot":       pivot,
+        "pivot_table": _period_pivot(pivot, col["bank"], col["rate_diff"]),
+        "vuln":        vuln,
+        "vuln_pivot":  _period_pivot(vuln, col["woori_prod"], VULN_COUNT_COL),
+        "styled_df":   display_frame(fdf),
+    }
+
+
+def headline_stats(fdf):
+    """배너/지표 카드용 요약: 비교 행 수, 최대 금리차, 가장 위협적인 행(은행/상품명), 고위험 상품 수, 비교 타행 수"""
+    col = comparison_columns(fdf) if not fdf.empty else None
+    if col is None:
+        return {"rows": 0, "max_diff": 0, "max_row": None, "high_risk": 0, "banks": 0, "top_bank": None, "top_prod": None}
+    diffs   = fdf[col["rate_diff"]]
+    max_row = fdf.loc[diffs.idxmax()]
+    return {
+        "rows":      len(fdf),
+        "max_diff":  diffs.max(),
+        "max_row":   max_row,
+        "high_risk": int((diffs >= HIGH_RISK_THRESHOLD).sum()),
+        "banks":     fdf[col["bank"]].nunique(),
+        "top_bank":  max_row[col["bank"]],
+        "top_prod":  max_row[col["bank_prod"]],
+    }
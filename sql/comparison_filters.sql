@@ -0,0 +1,70 @@
+-- 사이드바 필터를 서버에서 적용하는 비교 데이터 RPC
+-- get_new_better_products_v3() 결과 위에서 동작하며, 파라미터가 null 이면 해당 필터를 적용하지 않는다.
+-- v3 반환 컬럼명(product_type, save_trm, kor_co_nm, rate_diff, woori_prdt_nm)을 기준으로 작성됨
+
+-- 필터 선택지 (상품 타입 / 저축 기간 / 타행명)
+create or replace function get_comparison_facets()
+returns json
+language sql stable
+as $$
+  -- v3 는 한 번만 실행하고 세 선택지를 같은 결과에서 집계
+  with t as materialized (
+    select product_type, save_trm, kor_co_nm from get_new_better_products_v3()
+  )
+  select json_build_object(
+    'types',   coalesce(json_agg(distinct t.product_type order by t.product_type) filter (where t.product_type is not null), '[]'),
+    'periods', coalesce(json_agg(distinct t.save_trm order by t.save_trm)         filter (where t.save_trm is not null),     '[]'),
+    'banks',   coalesce(json_agg(distinct t.kor_co_nm order by t.kor_co_nm)       filter (where t.kor_co_nm is not null),    '[]')
+  )
+  from t;
+$$;
+
+-- 필터가 적용된 비교 행 (row_to_json 으로 v3 컬럼 순서를 그대로 유지)
+create or replace function get_new_better_products_filtered(
+  p_types   text[] default null,
+  p_periods int[]  default null,
+  p_banks   text[] default null
+)
+returns setof json
+language sql stable
+as $$
+  select row_to_json(t)
+  from get_new_better_products_v3() t
+  where (p_types   is null or t.product_type = any(p_types))
+    and (p_periods is null or t.save_trm     = any(p_periods))
+    and (p_banks   is null or t.kor_co_nm    = any(p_banks));
+$$;
+
+-- 타행 × 저축기간 최대 금리차 (히트맵)
+create or replace function get_rate_diff_heatmap(
+  p_types   text[] default null,
+  p_periods int[]  default null,
+  p_banks   text[] default null
+)
+returns table (kor_co_nm text, save_trm int, rate_diff numeric)
+language sql stable
+as $$
+  select t.kor_co_nm, t.save_trm, max(t.rate_diff)
+  from get_new_better_products_v3() t
+  where (p_types   is null or t.product_type = any(p_types))
+    and (p_periods is null or t.save_trm     = any(p_periods))
+    and (p_banks   is null or t.kor_co_nm    = any(p_banks))
+  group by t.kor_co_nm, t.save_trm;
+$$;
+
+-- 우리은행 상품 × 저축기간 경쟁 상품 수
+create or replace function get_woori_vuln_counts(
+  p_types   text[] default null,
+  p_periods int[]  default null,
+  p_banks   text[] default null
+)
+returns table (woori_prdt_nm text, save_trm int, cnt bigint)
+language sql stable
+as $$
+  select t.woori_prdt_nm, t.save_trm, count(*)
+  from get_new_better_products_v3() t
+  where (p_types   is null or t.product_type = any(p_types))
+    and (p_periods is null or t.save_trm     = any(p_periods))
+    and (p_banks   is null or t.kor_co_nm    = any(p_banks))
+  group by t.woori_prdt_nm, t.save_trm;
+$$;
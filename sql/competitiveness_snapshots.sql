@@ -0,0 +1,81 @@
+-- 수집일별 경쟁력 요약 스냅샷
+-- 첫 화면(배너, 지표 카드, 히트맵, 취약 상품 피벗)이 매 조회마다 비교 행 전체를 집계하지 않도록
+-- finance_data 적재가 끝난 뒤 한 번 materialize_competitiveness() 를 호출해 결과를 저장한다.
+--   기본: 수집 직후 실행하는 알림 작업(python -m monitor.alerts)이 새 수집분을 평가한 뒤 호출
+--   수집기: 적재 직후 supabase.rpc("materialize_competitiveness", {}) 호출
+--   또는 pg_cron: select cron.schedule('competitiveness', '30 9 * * *', 'select materialize_competitiveness()');
+-- get_new_better_products_v3() 가 최신 수집분을 비교하므로 스냅샷 날짜는 finance_data 의 마지막 수집일(KST)이다.
+
+create table if not exists competitiveness_daily (
+  snapshot_date   date primary key,
+  compared_rows   int         not null,   -- 우리은행보다 금리가 높은 타행 상품 쌍 수
+  max_diff        numeric     not null,
+  high_risk       int         not null,   -- 금리차 p_threshold 이상
+  banks           int         not null,
+  top_bank        text,
+  top_prdt_nm     text,
+  materialized_at timestamptz not null default now()
+);
+
+create table if not exists competitiveness_heatmap_daily (
+  snapshot_date date    not null references competitiveness_daily on delete cascade,
+  kor_co_nm     text    not null,
+  save_trm      int     not null,
+  rate_diff     numeric not null,
+  primary key (snapshot_date, kor_co_nm, save_trm)
+);
+
+create table if not exists competitiveness_vuln_daily (
+  snapshot_date date   not null references competitiveness_daily on delete cascade,
+  woori_prdt_nm text   not null,
+  save_trm      int    not null,
+  cnt           bigint not null,
+  primary key (snapshot_date, woori_prdt_nm, save_trm)
+);
+
+-- 같은 날짜로 다시 호출하면 덮어쓴다. 저장한 스냅샷 날짜를 반환
+create or replace function materialize_competitiveness(
+  p_date      date    default null,
+  p_threshold numeric default 0.3
+)
+returns date
+language plpgsql volatile
+as $$
+declare
+  v_date date := coalesce(p_date, (select max(collected_at at time zone 'Asia/Seoul')::date from finance_data));
+begin
+  create temporary table _cmp on commit drop as
+    select * from get_new_better_products_v3();
+
+  delete from competitiveness_daily where snapshot_date = v_date;
+
+  -- 최대 금리차 상품은 한 번만 골라 은행/상품명이 같은 행에서 나오게 한다 (동률은 은행명/상품명 순)
+  insert into competitiveness_daily (snapshot_date, compared_rows, max_diff, high_risk, banks, top_bank, top_prdt_nm)
+  select v_date, agg.compared_rows, agg.max_diff, agg.high_risk, agg.banks, top.kor_co_nm, top.fin_prdt_nm
+  from (
+    select count(*)                                            as compared_rows,
+           coalesce(max(t.rate_diff), 0)                       as max_diff,
+           count(*) filter (where t.rate_diff >= p_threshold)  as high_risk,
+           count(distinct t.kor_co_nm)                         as banks
+    from _cmp t
+  ) agg
+  left join (
+    select c.kor_co_nm, c.fin_prdt_nm
+    from _cmp c
+    order by c.rate_diff desc nulls last, c.kor_co_nm, c.fin_prdt_nm
+    limit 1
+  ) top on true;
+
+  insert into competitiveness_heatmap_daily (snapshot_date, kor_co_nm, save_trm, rate_diff)
+  select v_date, t.kor_co_nm, t.save_trm, max(t.rate_diff)
+  from _cmp t
+  group by t.kor_co_nm, t.save_trm;
+
+  insert into competitiveness_vuln_daily (snapshot_date, woori_prdt_nm, save_trm, cnt)
+  select v_date, t.woori_prdt_nm, t.save_trm, count(*)
+  from _cmp t
+  group by t.woori_prdt_nm, t.save_trm;
+
+  return v_date;
+end;
+$$;
@@ -0,0 +1,201 @@
+"""FakeSupabase 로 동기화/파생 계산 결과가 원본과 같은지 확인 (네트워크 없음)
+
+    python -m pytest -q
+"""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from bench.fake_supabase import FakeSupabase, make_comparison, make_history
+from monitor.alerts import evaluate, run
+from monitor.history_store import (
+    HISTORY_FIELDS, fetch_history_rows, history_columns, iter_history_pages, load_local, sync_increment,
+)
+from monitor.rate_changes import SERIES_KEYS
+from monitor.rate_cube import build_rate_cube, select_series
+from monitor.snapshots import MATERIALIZE_RPC
+from monitor.spreads import build_spreads, spread_streaks
+
+ROW_KEYS = ["collected_at"] + SERIES_KEYS
+
+
+def _frame(rows):
+    df = pd.DataFrame(rows, columns=HISTORY_FIELDS)
+    return df.sort_values(ROW_KEYS, na_position="first").reset_index(drop=True)
+
+
+def _days(history):
+    return sorted(history["collected_at"].unique())
+
+
+@pytest.fixture(scope="module")
+def history():
+    return make_history(n_banks=3, n_products=4, n_days=12, change_prob=0.1, seed=7)
+
+
+# ── 페이지네이션 / 동기화 ──
+@pytest.mark.parametrize("workers", [1, 4])
+def test_sync_returns_every_row_once_under_small_server_cap(history, workers):
+    # 서버 max-rows(37) 가 page_size 보다 작아 모든 페이지가 잘려 오고, 경계마다 같은 수집 시각이 나뉜다
+    client = FakeSupabase(history, max_rows=37)
+    rows   = fetch_history_rows(client, page_size=50, workers=workers)
+
+    synced = _frame(rows)
+    assert not synced.duplicated(ROW_KEYS).any()
+    pd.testing.assert_frame_equal(synced, _frame(history.to_dict("records")))
+
+
+def test_keyset_pages_respect_since_before_window(history):
+    days   = _days(history)
+    client = FakeSupabase(history, max_rows=37)
+    pages  = list(iter_history_pages(client, page_size=50, since=days[3], before=days[6]))
+
+    got      = _frame([row for page in pages for row in page])
+    expected = history[(history["collected_at"] >= days[3]) & (history["collected_at"] < days[6])]
+    assert sorted(got["collected_at"].unique()) == days[3:6]
+    assert len(got) == len(expected)
+    assert not got.duplicated(ROW_KEYS).any()
+
+
+def test_incremental_sync_fetches_only_rows_after_watermark(history, tmp_path):
+    columns = history_columns()
+    days    = _days(history)
+    first   = history[history["collected_at"] <= days[7]]
+
+    df, watermark, n_new = sync_increment(FakeSupabase(first, max_rows=37), None, None, tmp_path, columns, workers=4)
+    assert (n_new, watermark, len(df)) == (len(first), days[7], len(first))
+
+    df, watermark, n_new = sync_increment(FakeSupabase(history, max_rows=37), df, watermark, tmp_path, columns)
+    assert (n_new, watermark, len(df)) == (len(history) - len(first), days[-1], len(history))
+    assert not df.duplicated(ROW_KEYS).any()
+
+    # 로컬 사본도 같은 세대/watermark 로 남는다
+    local, local_watermark = load_local(tmp_path, columns)
+    assert (len(local), local_watermark) == (len(history), days[-1])
+
+    # 새 수집분이 없으면 같은 스냅샷을 그대로 돌려준다
+    same, _, n_new = sync_increment(FakeSupabase(history), df, watermark, tmp_path, columns)
+    assert n_new == 0 and same is df
+
+
+def test_partially_loaded_last_timestamp_heals_on_next_sync(history, tmp_path):
+    # 마지막 수집 시각을 적재하는 도중 (절반만 들어간 상태) 에 동기화
+    columns = history_columns()
+    last    = _days(history)[-1]
+    partial = history[history["collected_at"] < last]
+    partial = pd.concat([partial, history[history["collected_at"] == last].iloc[::2]], ignore_index=True)
+
+    df, watermark, _ = sync_increment(FakeSupabase(partial, max_rows=37), None, None, tmp_path, columns)
+    assert watermark == last and len(df) < len(history)
+
+    df, watermark, n_new = sync_increment(FakeSupabase(history, max_rows=37), df, watermark, tmp_path, columns)
+    assert (n_new, watermark, len(df)) == (len(history) - len(partial), last, len(history))
+    assert not df.duplicated(ROW_KEYS).any()
+    assert len(load_local(tmp_path, columns)[0]) == len(history)
+
+
+# ── 금리 큐브 ──
+def test_rate_cube_holds_each_series_value(history):
+    hist = history.assign(collected_at=pd.to_datetime(history["collected_at"]))
+    cube = build_rate_cube(hist)
+
+    n_series = len(history.drop_duplicates(SERIES_KEYS[:3] + ["rsrv_type_nm"]))
+    assert cube.shape == (len(_days(history)), n_series)
+
+    row = hist.iloc[len(hist) // 2]
+    col = (row["kor_co_nm"], row["fin_prdt_nm"], row["save_trm"], row["rsrv_type_nm"] or "")
+    assert cube.loc[row["collected_at"], col] == pytest.approx(row["intr_rate2"])
+
+    picked = select_series(cube, [(row["kor_co_nm"], row["fin_prdt_nm"])], [row["save_trm"]])
+    assert set(picked.columns.droplevel("rsrv_type_nm")) == {col[:3]}
+
+
+# ── 우리은행 대비 금리차 / 연속 우위 ──
+def _series(bank, product, rates, start="2026-01-01T00:00:00+00:00", skip=()):
+    days = pd.date_range(start, periods=len(rates), freq="D")
+    return pd.DataFrame([
+        {"collected_at": day, "kor_co_nm": bank, "fin_prdt_nm": product, "save_trm": 12,
+         "rsrv_type_nm": None, "product_type": "적금", "intr_rate2": rate}
+        for i, (day, rate) in enumerate(zip(days, rates)) if i not in skip
+    ])
+
+
+def test_spreads_fill_missing_days_and_count_streaks():
+    hist = pd.concat([
+        _series("우리은행", "우리 적금", [3.0] * 5),
+        # 네 번째 날 수집이 빠지면 직전 값(3.2)으로 이어 쓴다
+        _series("타행A", "A 적금", [2.9, 3.1, 3.2, 9.9, 3.0], skip=(3,)),
+    ], ignore_index=True)
+
+    spreads = build_spreads(hist)
+    assert spreads["rate_diff"].tolist() == [-0.1, 0.1, 0.2, 0.2, 0.0]
+
+    streak = spread_streaks(spreads).iloc[0]
+    assert (streak["days"], streak["days_ahead"], streak["longest_streak"], streak["current_streak"]) == (5, 3, 3, 0)
+    assert streak["max_diff"] == pytest.approx(0.2)
+
+
+def test_series_no_longer_collected_is_not_currently_ahead():
+    hist = pd.concat([
+        _series("우리은행", "우리 적금", [3.0] * 10),
+        _series("타행A", "A 적금", [3.2] * 10),
+        # 여섯째 날부터 수집되지 않는 상품 (마지막 날까지 우위였음)
+        _series("타행B", "B 적금", [3.3] * 5),
+    ], ignore_index=True)
+
+    streaks = spread_streaks(build_spreads(hist)).set_index("kor_co_nm")
+    assert streaks.loc["타행A", "current_streak"] == 10
+    assert streaks.loc["타행B", "current_streak"] == 0
+    assert pd.isna(streaks.loc["타행B", "ahead_since"])
+    assert streaks.loc["타행B", "longest_streak"] == 5
+
+
+# ── 알림 ──
+def test_alerts_report_new_worsened_and_top_changes(history):
+    fdf = make_comparison(history.assign(collected_at=pd.to_datetime(history["collected_at"])))
+    fdf = fdf.sort_values("rate_diff", ascending=False).head(3).reset_index(drop=True)
+    fdf["rate_diff"] = [0.6, 0.5, 0.4]
+
+    alerts, state = evaluate(fdf, {})
+    assert [a["kind"] for a in alerts] == ["new"] * 3
+
+    # 변화 없음 → 알림 없음
+    assert evaluate(fdf, state)[0] == []
+
+    # 셋째 행이 가장 위협적인 상품으로 올라서면 악화 + 최상위 변경
+    worse = fdf.assign(rate_diff=[0.6, 0.5, 0.7])
+    alerts, _ = evaluate(worse, state)
+    assert sorted(a["kind"] for a in alerts) == ["top_changed", "worsened"]
+    assert all(a["prev_rate_diff"] in (0.4, 0.6) for a in alerts)
+
+
+class _SnapshotSupabase(FakeSupabase):
+    """materialize_competitiveness 가 배포된 환경"""
+
+    def __init__(self, history):
+        super().__init__(history)
+        self.materialized = []
+
+    def rpc(self, name, params):
+        if name == MATERIALIZE_RPC:
+            self.materialized.append(params)
+            return SimpleNamespace(execute=lambda: SimpleNamespace(data="2025-01-12"))
+        return super().rpc(name, params)
+
+
+def test_alert_run_materializes_snapshot_for_new_collection(history, tmp_path):
+    state, log = tmp_path / "state.json", tmp_path / "alerts.jsonl"
+
+    # 스냅샷 SQL 미배포: 알림은 그대로 남고 snapshot_date 만 None
+    summary = run(FakeSupabase(history), state, log)
+    assert summary["evaluated"] and summary["snapshot_date"] is None
+
+    client  = _SnapshotSupabase(history)
+    summary = run(client, state, log, force=True)
+    assert summary["snapshot_date"] == "2025-01-12"
+    assert client.materialized == [{"p_threshold": 0.3}]
+
+    # 새 수집분이 없으면 평가도 스냅샷 저장도 하지 않는다
+    assert not run(client, state, log)["evaluated"]
+    assert len(client.materialized) == 1
@@ -0,0 +1,42 @@
+"""금리 변동 감지 엔진 (monitor.rate_changes)"""
+import pandas as pd
+
+from monitor.rate_changes import detect_rate_changes, recent_changes
+
+
+def _history(rates, start="2026-01-01T00:00:00+00:00"):
+    """한 시리즈의 일별 수집 (rates[i] = i 번째 날 최대금리, 기본금리는 0.5%p 낮게)"""
+    days = pd.date_range(start, periods=len(rates), freq="D")
+    return pd.DataFrame({
+        "collected_at": days,
+        "kor_co_nm":    "타행A",
+        "fin_prdt_nm":  "A 적금",
+        "save_trm":     12,
+        "rsrv_type_nm": None,
+        "intr_rate":    [r - 0.5 for r in rates],
+        "intr_rate2":   rates,
+    })
+
+
+def test_detects_only_changed_collections():
+    events = detect_rate_changes(_history([3.0, 3.0, 3.1, 3.1, 3.0]))
+    assert events["collected_at"].dt.day.tolist() == [3, 5]
+    assert events["prev_intr_rate2"].tolist() == [3.0, 3.1]
+    assert events["intr_rate2"].tolist() == [3.1, 3.0]
+
+
+def test_recent_window_counts_back_from_last_collection():
+    # 40일 이력에서 5일째 한 번만 변동 → 마지막 수집일 기준 최근 7일에는 변동이 없다
+    hist   = _history([3.0] * 4 + [3.2] * 36)
+    events = detect_rate_changes(hist)
+    assert len(events) == 1
+
+    latest = hist["collected_at"].max()
+    assert recent_changes(events, latest, 7).empty
+    assert len(recent_changes(events, latest, 40)) == 1
+
+
+def test_recent_changes_latest_first():
+    hist   = _history([3.0, 3.1, 3.2, 3.3])
+    recent = recent_changes(detect_rate_changes(hist), hist["collected_at"].max(), 7)
+    assert recent["collected_at"].is_monotonic_decreasing